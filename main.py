@@ -1,25 +1,66 @@
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
+# Só stdlib e o DataLoader no topo: rich, pandas e o motor são importados quando usados,
+# então o menu (e o --help do modo em lote) abre sem pagar essas importações
 from src.data_loader import DataLoader
-from src.processor import DataProcessor
-from src.analyzer import StatisticalEngine
-from src.predictor import BetAdvisor
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import contextlib
+import importlib.util
+import json
 import os
+import sys
+import time
 
-console = Console()
+class _LazyConsole:
+    """Console do rich criado no primeiro uso."""
+    _console = None
+
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+console = _LazyConsole()
+_background = ThreadPoolExecutor(max_workers=1)  # threads só nascem no primeiro submit
+
+def atualizar_todas_ligas():
+    """Baixa e processa todas as ligas em paralelo, mostrando tempos e falhas."""
+    from rich.table import Table
+    from src.pipeline import refresh_leagues
+
+    with console.status("[bold green]Atualizando todas as ligas em paralelo...", spinner="dots"):
+        resultados = refresh_leagues(build_engines=False)
+
+    tabela = Table(title="🔄 Atualização das Ligas")
+    tabela.add_column("Liga", style="cyan")
+    tabela.add_column("Jogos", justify="right")
+    tabela.add_column("Download", justify="right")
+    tabela.add_column("Processamento", justify="right")
+    tabela.add_column("Status")
+    for r in resultados:
+        status = "[green]OK[/green]" if r['ok'] else f"[red]{r['erro']}[/red]"
+        tabela.add_row(r['liga'], str(r['jogos']), f"{r['download_s']:.2f}s", f"{r['processamento_s']:.2f}s", status)
+    console.print(tabela)
 
 def selecionar_campeonato():
     """Exibe menu para escolher o campeonato e baixa os dados."""
+    from rich.prompt import Prompt
+
     loader = DataLoader()
     ligas = list(loader.LEAGUES.keys())
     
-    console.print("[bold yellow]🌎 Campeonatos Disponíveis:[/bold yellow]")
-    for i, liga in enumerate(ligas, 1):
-        console.print(f"{i}. {liga}")
-        
-    escolha = Prompt.ask("\nEscolha o número do campeonato", choices=[str(i) for i in range(1, len(ligas)+1)])
+    while True:
+        console.print("[bold yellow]🌎 Campeonatos Disponíveis:[/bold yellow]")
+        console.print("0. 🔄 Atualizar todas as ligas")
+        for i, liga in enumerate(ligas, 1):
+            console.print(f"{i}. {liga}")
+            
+        escolha = Prompt.ask("\nEscolha o número do campeonato", choices=[str(i) for i in range(0, len(ligas)+1)])
+        if escolha != "0":
+            break
+        atualizar_todas_ligas()
+
     liga_selecionada = ligas[int(escolha)-1]
     
     # Baixa e Salva os dados da liga escolhida
@@ -29,6 +70,10 @@ def selecionar_campeonato():
     return caminho_arquivo, liga_selecionada
 
 def main():
+    from rich.table import Table
+    from rich.panel import Panel
+    from rich.prompt import Prompt, Confirm
+
     console.print(Panel.fit("[bold green]⚽ Sistema de Análise Estatística Multi-Ligas (25/26)[/bold green]"))
     
     while True:
@@ -41,6 +86,10 @@ def main():
 
         # 2. Inicialização do Processador com o arquivo correto
         with console.status(f"[bold green]Processando dados da {nome_liga}...", spinner="dots"):
+            from src.processor import DataProcessor
+            from src.analyzer import StatisticalEngine
+            from src.predictor import BetAdvisor
+
             # AQUI ESTÁ O SEGREDO: Passamos o caminho do arquivo específico
             processor = DataProcessor(raw_data_path=caminho_csv)
             
@@ -49,9 +98,10 @@ def main():
                 continue
                 
             df = processor.df
-            engine = StatisticalEngine(df)
-            advisor = BetAdvisor(engine)
             times = processor.listar_times()
+
+        # O motor é montado em segundo plano enquanto o usuário escolhe os times
+        motor = _background.submit(lambda: BetAdvisor(StatisticalEngine(df)))
         
         console.print(f"\n✅ [bold blue]{len(times)} times da {nome_liga} carregados![/bold blue]\n")
         
@@ -77,7 +127,9 @@ def main():
                 console.print("[bold red]❌ Erro: Times iguais![/bold red]")
                 continue
 
-            # Análise
+            # Análise (espera o motor, se ainda estiver sendo montado)
+            advisor = motor.result()
+            engine = advisor.engine
             analise = advisor.get_match_suggestion(mandante, visitante)
             
             if "erro" in analise:
@@ -123,6 +175,17 @@ def main():
             probs.add_row(f"Vitória {visitante}", f"{stats['prob_away']}%")
             console.print(probs)
 
+            # Escadas de Over (Escanteios e Cartões) com a odd justa de cada linha
+            for titulo, escada in (("🚩 Escanteios", sec['corners_markets']), ("🟨 Cartões", sec['cards_markets'])):
+                linhas = Table(title=titulo, show_header=True)
+                linhas.add_column("Linha", style="yellow")
+                linhas.add_column("Over", style="magenta")
+                linhas.add_column("Odd Justa", style="green")
+                for chave, prob in escada.items():
+                    if chave.startswith('over_') and prob > 0:
+                        linhas.add_row(f"Over {chave[5:]}", f"{prob * 100:.1f}%", f"{1 / prob:.2f}")
+                console.print(linhas)
+
             # Tips
             console.print("\n[bold cyan]💡 Dicas de Aposta:[/bold cyan]")
             if not analise['sugestoes']:
@@ -146,5 +209,222 @@ def main():
             break
         console.clear()
 
+# --- Modo em lote (sem interação, para cron/scripts) ---
+
+def resolver_ligas(valores):
+    """Aceita códigos (E0), nomes de DataLoader.LEAGUES ou 'all'."""
+    ligas = DataLoader.LEAGUES
+    if not valores or 'all' in valores:
+        return list(ligas)
+    por_codigo = {codigo: nome for nome, codigo in ligas.items()}
+    resolvidas = []
+    for valor in valores:
+        nome = por_codigo.get(valor.upper(), valor)
+        if nome not in ligas:
+            raise SystemExit(f"❌ Liga '{valor}' não encontrada. Opções: {', '.join(por_codigo)}")
+        resolvidas.append(nome)
+    return resolvidas
+
+def ler_confrontos(caminho):
+    """Lê confrontos (mandante/visitante ou o fixtures.csv do Football-Data: Div, Date, HomeTeam, AwayTeam)."""
+    import pandas as pd
+
+    confrontos = pd.read_csv(caminho).rename(columns={'HomeTeam': 'mandante', 'AwayTeam': 'visitante', 'Date': 'data'})
+    if not {'mandante', 'visitante'} <= set(confrontos.columns):
+        raise SystemExit(f"❌ {caminho} precisa das colunas mandante/visitante (ou HomeTeam/AwayTeam).")
+    return confrontos
+
+def previsoes_da_liga(resultado, confrontos, full_book, filtrar_times):
+    """Precifica os confrontos (ou todos os pares) de uma liga de uma vez."""
+    import pandas as pd
+    from src.pipeline import prediction_frame
+
+    engine = resultado['engine']
+    if confrontos is None:
+        mandantes, visitantes = engine.all_pairings()
+        extras = pd.DataFrame(index=range(len(mandantes)))
+    else:
+        jogos = confrontos
+        if 'Div' in jogos:
+            jogos = jogos[jogos['Div'] == resultado['codigo']]
+        elif filtrar_times:
+            # Vários campeonatos sem a coluna Div: cada liga fica com os jogos dos seus times
+            jogos = jogos[jogos['mandante'].isin(engine.team_ids) & jogos['visitante'].isin(engine.team_ids)]
+        mandantes, visitantes = jogos['mandante'].to_numpy(), jogos['visitante'].to_numpy()
+        extras = jogos[[c for c in ('data',) if c in jogos]].reset_index(drop=True)
+
+    tabela = prediction_frame(engine, mandantes, visitantes, full_book=full_book)
+    tabela.insert(0, 'temporada', resultado['temporada'])
+    tabela.insert(0, 'liga', resultado['codigo'])
+    return pd.concat([extras, tabela], axis=1)
+
+FORMATOS_SAIDA = ('.csv', '.jsonl', '.parquet')
+
+def formato_saida(destino):
+    """Formato de exportação pela extensão ('-' = CSV na saída padrão)."""
+    formato = '.csv' if destino == '-' else Path(destino).suffix.lower()
+    if formato not in FORMATOS_SAIDA:
+        raise SystemExit(f"❌ Formato '{formato}' não suportado (use .csv, .jsonl ou .parquet).")
+    if formato == '.parquet' and importlib.util.find_spec('pyarrow') is None:
+        raise SystemExit("❌ Exportar em Parquet exige o pyarrow (pip install pyarrow).")
+    return formato
+
+def exportar_previsoes(tabelas, destino):
+    """
+    Grava as tabelas à medida que cada liga termina (streaming) em CSV, JSONL ou Parquet,
+    conforme a extensão de destino ('-' = CSV na saída padrão).
+    :return: Total de linhas gravadas
+    """
+    formato = formato_saida(destino)
+    if formato == '.parquet':
+        try:
+            import pyarrow
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Exportar em Parquet exige o pyarrow (pip install pyarrow).")
+
+    total, writer = 0, None
+    saida = sys.stdout if destino == '-' else None
+    try:
+        for tabela in tabelas:
+            if formato == '.parquet':
+                dados = pyarrow.Table.from_pandas(tabela, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(destino, dados.schema)
+                writer.write_table(dados.cast(writer.schema))
+            else:
+                if saida is None:
+                    saida = open(destino, 'w', encoding='utf-8', newline='')
+                if formato == '.csv':
+                    tabela.to_csv(saida, index=False, header=(total == 0))
+                else:
+                    if len(tabela):
+                        linhas = tabela.to_json(orient='records', lines=True, force_ascii=False, date_format='iso')
+                        saida.write(linhas.rstrip('\n') + '\n')
+            total += len(tabela)
+    finally:
+        if writer is not None:
+            writer.close()
+        if saida is not None and saida is not sys.stdout:
+            saida.close()
+    return total
+
+def batch(argv):
+    """python main.py batch --league E0 --fixtures fixtures.csv --out previsoes.parquet"""
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Previsões em lote, sem interação.")
+    parser.add_argument('--league', nargs='+', default=['all'], help="Códigos (E0 SP1 ...), nomes ou 'all'")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument('--fixtures', help="CSV de confrontos (mandante/visitante ou HomeTeam/AwayTeam[/Div])")
+    origem.add_argument('--all-pairs', action='store_true', help="Todos os confrontos N×(N-1) de cada liga")
+    parser.add_argument('--out', default='-', help="Arquivo .csv, .jsonl ou .parquet ('-' = CSV na saída padrão)")
+    parser.add_argument('--season', default=DataLoader.SEASON, help="Temporada no formato do Football-Data (ex: 2526)")
+    parser.add_argument('--csv', help="CSV local da liga no lugar do download (uma liga só)")
+    parser.add_argument('--workers', type=int, default=8, help="Ligas carregadas em paralelo")
+    parser.add_argument('--full-book', action='store_true', help="Inclui todas as linhas de mercado")
+    args = parser.parse_args(argv)
+    formato_saida(args.out)  # falha antes de baixar/precificar as ligas
+
+    from rich.console import Console
+    from src.processor import DataProcessor
+    from src.analyzer import StatisticalEngine
+    from src.pipeline import refresh_leagues
+
+    log = Console(stderr=True)
+    ligas = resolver_ligas(args.league)
+    confrontos = ler_confrontos(args.fixtures) if args.fixtures else None
+    start = time.perf_counter()
+
+    # Mensagens de download/processamento vão para stderr (stdout pode ser o próprio CSV)
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.csv:
+            if len(ligas) != 1:
+                raise SystemExit("❌ --csv aceita uma liga só (use --league com um código).")
+            processor = DataProcessor(raw_data_path=args.csv)
+            resultados = [{'liga': ligas[0], 'codigo': DataLoader.LEAGUES[ligas[0]], 'temporada': args.season,
+                           'ok': processor.df is not None, 'erro': "Falha ao processar CSV",
+                           'engine': StatisticalEngine(processor.df) if processor.df is not None else None}]
+        else:
+            resultados = refresh_leagues(ligas, seasons=[args.season], workers=args.workers)
+
+    for r in resultados:
+        if not r['ok']:
+            log.print(f"[bold red]❌ {r['liga']}: {r['erro']}[/bold red]")
+    prontos = [r for r in resultados if r['ok']]
+    carga = time.perf_counter() - start
+
+    tabelas = (previsoes_da_liga(r, confrontos, args.full_book, len(prontos) > 1) for r in prontos)
+    linhas = exportar_previsoes(tabelas, args.out)
+    log.print(f"✅ {linhas} confrontos de {len(prontos)} liga(s) em {time.perf_counter() - start:.2f}s "
+              f"(carga {carga:.2f}s) -> {args.out}")
+    return 0 if prontos else 1
+
+def serve(argv):
+    """python main.py serve --league E0 SP1 --port 8000"""
+    import asyncio
+    from src.server import PredictionService
+
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serviço HTTP local de previsões.")
+    parser.add_argument('--league', nargs='+', default=['all'], help="Códigos (E0 SP1 ...), nomes ou 'all'")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--refresh', type=int, default=600, help="Segundos entre as verificações de dados novos")
+    args = parser.parse_args(argv)
+
+    codigos = [DataLoader.LEAGUES[nome] for nome in resolver_ligas(args.league)]
+    service = PredictionService(leagues=codigos, refresh_interval=args.refresh)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def matrix(argv):
+    """python main.py matrix --league E0 SP1 [--query Arsenal Chelsea]"""
+    parser = argparse.ArgumentParser(prog="main.py matrix",
+                                     description="Matriz N×N de todos os confrontos por liga (reconstruída só com dados novos).")
+    parser.add_argument('--league', nargs='+', default=['all'], help="Códigos (E0 SP1 ...), nomes ou 'all'")
+    parser.add_argument('--season', default=DataLoader.SEASON, help="Temporada no formato do Football-Data (ex: 2526)")
+    parser.add_argument('--csv', help="CSV local da liga no lugar do download (uma liga só)")
+    parser.add_argument('--workers', type=int, default=8, help="Ligas carregadas em paralelo")
+    parser.add_argument('--query', nargs=2, metavar=('MANDANTE', 'VISITANTE'), help="Consulta um confronto")
+    args = parser.parse_args(argv)
+
+    from src.league_matrix import LeagueMatrix, build_league_matrices
+
+    ligas = resolver_ligas(args.league)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.csv:
+            if len(ligas) != 1:
+                raise SystemExit("❌ --csv aceita uma liga só (use --league com um código).")
+            codigo = f"{DataLoader.LEAGUES[ligas[0]]}_{args.season}"
+            matriz = LeagueMatrix.load_or_build(args.csv, code=codigo)
+            matrizes = {codigo: matriz} if matriz is not None else {}
+        else:
+            matrizes = build_league_matrices(ligas, seasons=[args.season], workers=args.workers)
+    print(f"🧮 {len(matrizes)} matriz(es) prontas em {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    if args.query:
+        mandante, visitante = args.query
+        for codigo, matriz in matrizes.items():
+            inicio = time.perf_counter()
+            previsao = matriz.query(mandante, visitante)
+            if previsao is not None:
+                print(json.dumps({'liga': codigo, 'mandante': mandante, 'visitante': visitante,
+                                  **{k: round(v, 4) for k, v in previsao.items()},
+                                  'consulta_us': round((time.perf_counter() - inicio) * 1e6, 1)}, ensure_ascii=False))
+                return 0
+        print(f"❌ Confronto {mandante} x {visitante} não encontrado.", file=sys.stderr)
+        return 1
+    for codigo, matriz in matrizes.items():
+        print(f"   {codigo:<10} {len(matriz.teams):>3} times | dados {matriz.version}", file=sys.stderr)
+    return 0 if matrizes else 1
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(batch(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        sys.exit(serve(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "matrix":
+        sys.exit(matrix(sys.argv[2:]))
     main()
\ No newline at end of file
@@ -1,88 +1,328 @@
+import time
 import numpy as np
-from scipy.stats import poisson
+import pandas as pd
+from src.markets import CARD_LINES, CORNER_LINES, MarketEvaluator, count_ladder, poisson_pmf
+from src.ratings import DixonColesModel
+from src.processor import encode_teams
+from src.profiling import timed
+
+# Grade de placar: no mínimo 0 a 5 gols por time, crescendo com o lambda
+# até a cauda P(X >= G) ficar abaixo de TAIL_EPSILON (limitada a GOALS_CAP)
+MIN_GOALS = 6
+GOALS_CAP = 20
+TAIL_EPSILON = 1e-6
+
+# Colunas agregadas no índice por time (somas/contagens em casa e fora)
+INDEX_COLUMNS = [
+    'gols_mandante', 'gols_visitante',
+    'cantos_mandante', 'cantos_visitante',
+    'amarelos_mandante', 'amarelos_visitante',
+    'vermelhos_mandante', 'vermelhos_visitante',
+]
+
+# Totais por jogo modelados como contagens (Binomial Negativa com dispersão por time)
+COUNT_STATS = {
+    'cantos': ['cantos_mandante', 'cantos_visitante'],
+    'cartoes': ['amarelos_mandante', 'amarelos_visitante', 'vermelhos_mandante', 'vermelhos_visitante'],
+}
+# Jogos "fictícios" com a dispersão da liga: encolhe a dispersão de times com poucos jogos
+DISPERSION_PRIOR = 10
+
+def goal_grid_size(max_lambda, epsilon=TAIL_EPSILON):
+    """Menor G (entre MIN_GOALS e GOALS_CAP) com P(X >= G) < epsilon para o maior lambda."""
+    if not np.isfinite(max_lambda):
+        return MIN_GOALS
+    sizes = np.arange(MIN_GOALS, GOALS_CAP + 1)
+    cdf = np.cumsum(poisson_pmf([max_lambda], GOALS_CAP)[0])
+    covered = 1 - cdf[sizes - 1] < epsilon  # P(X >= G) = 1 - P(X <= G-1)
+    return int(sizes[covered.argmax()]) if covered.any() else GOALS_CAP
+
+def count_dispersion(moments):
+    """Dispersão alpha (var = média + alpha·média²) pelo método dos momentos; moments[..., :] = (n, soma, soma²)."""
+    n, total, squares = moments[..., 0], moments[..., 1], moments[..., 2]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        variance = (squares - n * mean ** 2) / (n - 1)
+        return np.clip((variance - mean) / mean ** 2, 0, None)
+
+def score_matrices(lambda_home, lambda_away, max_goals=None, epsilon=TAIL_EPSILON, fold_tail=True):
+    """
+    Matrizes de placar em lote: tensor (n_jogos, G, G) com P(casa=h, fora=a).
+    Cada pmf é calculada uma vez por lambda e combinada por broadcast (produto externo).
+    Sem max_goals, G se adapta ao maior lambda do lote; com fold_tail, a massa de
+    G ou mais gols entra na última linha/coluna e cada matriz soma 1.
+    """
+    lambda_home = np.asarray(lambda_home, dtype=float)
+    lambda_away = np.asarray(lambda_away, dtype=float)
+    if max_goals is None:
+        lambdas = np.concatenate([lambda_home, lambda_away])
+        max_goals = goal_grid_size(np.nanmax(lambdas) if np.isfinite(lambdas).any() else np.nan, epsilon)
+
+    pmf_home = poisson_pmf(lambda_home, max_goals)
+    pmf_away = poisson_pmf(lambda_away, max_goals)
+    if fold_tail:
+        # Última célula passa a ser P(X >= G-1)
+        pmf_home[:, -1] = 1 - pmf_home[:, :-1].sum(axis=1)
+        pmf_away[:, -1] = 1 - pmf_away[:, :-1].sum(axis=1)
+    return pmf_home[:, :, None] * pmf_away[:, None, :]
+
+# Médias da liga (chave em league_avgs: coluna de INDEX_COLUMNS)
+LEAGUE_AVG_COLUMNS = {
+    'home_goals': 'gols_mandante', 'away_goals': 'gols_visitante',
+    'home_corners': 'cantos_mandante', 'away_corners': 'cantos_visitante',
+}
 
 class StatisticalEngine:
+    @timed('engine.build')
     def __init__(self, df):
-        self.df = df
-        self.league_avgs = self._calculate_league_averages()
+        self.df = df  # lotes de update() ficam em self._pending até alguém ler self.df
+        self.markets = MarketEvaluator()
+        self.model = None  # DixonColesModel opcional (fit_ratings); None = razão de médias
+        self._col = {col: j for j, col in enumerate(INDEX_COLUMNS)}
 
-    def _calculate_league_averages(self):
-        return {
-            'home_goals': self.df['gols_mandante'].mean(),
-            'away_goals': self.df['gols_visitante'].mean(),
-            # Tratamento de erro com .get() para ligas que não têm essas colunas (ex: Brasil)
-            'home_corners': self.df.get('cantos_mandante', self.df['gols_mandante']*0).mean(),
-            'away_corners': self.df.get('cantos_visitante', self.df['gols_visitante']*0).mean(),
-        }
+        # Estado acumulado (somas e contagens), atualizável em O(jogos novos) via update()
+        self.teams = []
+        self.team_ids = {}
+        self._team_index = pd.Index([], dtype=object)
+        self._league_sums = np.zeros(len(INDEX_COLUMNS))
+        self._league_counts = np.zeros(len(INDEX_COLUMNS))
+        self._home_sums = np.zeros((0, len(INDEX_COLUMNS)))
+        self._home_counts = np.zeros((0, len(INDEX_COLUMNS)))
+        self._away_sums = np.zeros((0, len(INDEX_COLUMNS)))
+        self._away_counts = np.zeros((0, len(INDEX_COLUMNS)))
+        self.home_games = np.zeros(0, dtype=int)
+        self.away_games = np.zeros(0, dtype=int)
+        self._league_moments = np.zeros((len(COUNT_STATS), 3))
+        self._team_moments = np.zeros((0, len(COUNT_STATS), 3))
 
-    def calculate_strength(self, team):
-        # ... (Mantendo a lógica de ataque/defesa igual) ...
-        home_games = self.df[self.df['mandante'] == team]
-        if home_games.empty: return None
-        
-        att_home = home_games['gols_mandante'].mean() / self.league_avgs['home_goals']
-        def_home = home_games['gols_visitante'].mean() / self.league_avgs['away_goals']
+        self._build_team_index(df)
+        self._refresh()
+
+    @property
+    def df(self):
+        """Histórico completo; os lotes de update() só são concatenados quando ele é lido."""
+        if self._pending:
+            self._df = pd.concat([self._df, *self._pending], ignore_index=True)
+            self._pending = []
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+        self._pending = []
+
+    def _build_team_index(self, df):
+        """
+        Soma os jogos ao índice por time: somas/contagens em casa e fora.
+        Cada linha das matrizes corresponde a um time (self.teams), cada coluna a INDEX_COLUMNS.
+        Times viram ids inteiros e as somas saem de np.bincount sobre arrays contíguos.
+        Linhas sem mandante/visitante (ex: a linha ",,,," no fim de alguns CSVs) são ignoradas.
+        """
+        df = df[df['mandante'].notna() & df['visitante'].notna()]
+        new_teams = set(pd.unique(df['mandante'])).union(pd.unique(df['visitante'])) - set(self.team_ids)
+        if new_teams:
+            self._add_teams(new_teams)
+        n = len(self.teams)
+        home_ids = encode_teams(df['mandante'], self._team_index)
+        away_ids = encode_teams(df['visitante'], self._team_index)
+
+        # Colunas ausentes (ligas sem escanteios/cartões) viram zero, como no .get() antigo
+        values = df.reindex(columns=INDEX_COLUMNS, fill_value=0).to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        self._league_sums += filled.sum(axis=0)
+        self._league_counts += present.sum(axis=0)
+
+        def scatter(ids, matrix):
+            """Soma as linhas de `matrix` por time: (n_jogos, k) -> (n_times, k)."""
+            return np.column_stack([np.bincount(ids, matrix[:, j], n) for j in range(matrix.shape[1])])
 
-        away_games = self.df[self.df['visitante'] == team]
-        if away_games.empty: return None
+        # Momentos (n, soma, soma²) dos totais por jogo, para a dispersão de cantos/cartões
+        col = self._col
+        totals = np.column_stack([values[:, [col[c] for c in cols]].sum(axis=1) for cols in COUNT_STATS.values()])
+        known = ~np.isnan(totals)
+        totals = np.where(known, totals, 0.0)
+        moments = np.stack([known.astype(float), totals, totals ** 2], axis=2)  # (n_jogos, n_estat, 3)
+        flat = moments.reshape(len(moments), len(COUNT_STATS) * 3)
+        self._league_moments += moments.sum(axis=0)
+        for ids in (home_ids, away_ids):
+            self._team_moments += scatter(ids, flat).reshape(n, len(COUNT_STATS), 3)
 
-        att_away = away_games['gols_visitante'].mean() / self.league_avgs['away_goals']
-        def_away = away_games['gols_mandante'].mean() / self.league_avgs['home_goals']
+        self._home_sums += scatter(home_ids, filled)
+        self._home_counts += scatter(home_ids, present)
+        self.home_games += np.bincount(home_ids, minlength=n)
+
+        self._away_sums += scatter(away_ids, filled)
+        self._away_counts += scatter(away_ids, present)
+        self.away_games += np.bincount(away_ids, minlength=n)
+
+    def encode(self, teams):
+        """Nomes -> ids do índice do motor (-1 para times sem dados)."""
+        return encode_teams(teams, self._team_index)
+
+    def _add_teams(self, new_teams):
+        """Inclui times novos mantendo self.teams ordenado (mesma ordem de uma reconstrução)."""
+        teams = sorted(set(self.teams).union(new_teams))
+        positions = np.array([teams.index(t) for t in self.teams], dtype=int)
+
+        def grow(values):
+            grown = np.zeros((len(teams),) + values.shape[1:], dtype=values.dtype)
+            grown[positions] = values
+            return grown
+
+        self._home_sums, self._home_counts = grow(self._home_sums), grow(self._home_counts)
+        self._away_sums, self._away_counts = grow(self._away_sums), grow(self._away_counts)
+        self.home_games, self.away_games = grow(self.home_games), grow(self.away_games)
+        self._team_moments = grow(self._team_moments)
+        self.teams = teams
+        self.team_ids = {team: i for i, team in enumerate(teams)}
+        self._team_index = pd.Index(teams)
+
+    def _refresh(self):
+        """Recalcula médias e forças a partir das somas/contagens (O(times), não O(jogos))."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            league_means = self._league_sums / self._league_counts
+            self.home_means = self._home_sums / self._home_counts
+            self.away_means = self._away_sums / self._away_counts
+            self.league_avgs = {key: league_means[self._col[col]] for key, col in LEAGUE_AVG_COLUMNS.items()}
+
+            # Forças pré-calculadas para todos os times (NaN para quem não jogou em casa/fora)
+            g_home, g_away = self._col['gols_mandante'], self._col['gols_visitante']
+            self.attack_home = self.home_means[:, g_home] / self.league_avgs['home_goals']
+            self.defense_home = self.home_means[:, g_away] / self.league_avgs['away_goals']
+            self.attack_away = self.away_means[:, g_away] / self.league_avgs['away_goals']
+            self.defense_away = self.away_means[:, g_home] / self.league_avgs['home_goals']
+
+        # Dispersão (n_times, n_estatísticas) encolhida para a da liga conforme o número de jogos
+        league_alpha = np.nan_to_num(count_dispersion(self._league_moments))
+        team_alpha = count_dispersion(self._team_moments)
+        weight = self._team_moments[..., 0] / (self._team_moments[..., 0] + DISPERSION_PRIOR)
+        self.league_dispersion = league_alpha
+        self.dispersion = np.where(np.isfinite(team_alpha),
+                                   weight * team_alpha + (1 - weight) * league_alpha, league_alpha)
+
+    @timed('engine.update')
+    def update(self, new_matches, refit=True):
+        """
+        Absorve jogos novos (mesmas colunas do DataProcessor) sem reconstruir o motor:
+        soma os jogos às contagens da liga e dos times e recalcula médias/forças.
+        O resultado é idêntico a criar um StatisticalEngine com a temporada completa; o lote
+        só é concatenado ao histórico (self.df) quando alguém o lê (simulador, ajuste DC).
+        :param refit: Reajusta o modelo Dixon-Coles (se houver) no histórico completo; False
+                      deixa o modelo como está até o próximo reajuste (ver WalkForwardBacktest)
+        """
+        if new_matches is None or len(new_matches) == 0:
+            return self
+        self._pending.append(new_matches)
+        self._build_team_index(new_matches)
+        self._refresh()
+        if self.model is not None and refit:
+            self.model.fit(self.df)  # warm start a partir dos parâmetros atuais
+        return self
+
+    @timed('engine.fit_ratings')
+    def fit_ratings(self, **kwargs):
+        """
+        Ajusta um DixonColesModel (máxima verossimilhança) na liga e passa a usá-lo
+        em calculate_strength/predict_match/predict_matches.
+        :param kwargs: xi, dixon_coles, l2 (ver DixonColesModel)
+        """
+        self.model = DixonColesModel(**kwargs).fit(self.df)
+        return self.model
+
+    def use_ratings(self, model=None):
+        """Troca o modelo de forças (None volta para a razão de médias)."""
+        self.model = model
+
+    def _team_id(self, team):
+        """Posição do time no índice, ou None se ele não tiver jogos em casa E fora."""
+        i = self.team_ids.get(team)
+        if i is None or self.home_games[i] == 0 or self.away_games[i] == 0:
+            return None
+        return i
+
+    def calculate_strength(self, team):
+        if self.model is not None:
+            return self.model.strength(team)
+
+        # Consulta O(1) no índice pré-calculado em _build_team_index
+        i = self._team_id(team)
+        if i is None: return None
 
         return {
-            'attack_home': att_home, 'defense_home': def_home,
-            'attack_away': att_away, 'defense_away': def_away
+            'attack_home': self.attack_home[i], 'defense_home': self.defense_home[i],
+            'attack_away': self.attack_away[i], 'defense_away': self.defense_away[i]
         }
 
     def predict_corners_cards(self, home_team, away_team):
         """
         CORRIGIDO: Calcula Escanteios e Cartões cruzando Ataque x Defesa.
+        Inclui as escadas de over/under (probabilidades) de predict_counts.
         """
-        h_games = self.df[self.df['mandante'] == home_team]
-        a_games = self.df[self.df['visitante'] == away_team]
-        
-        if h_games.empty or a_games.empty: 
-            return {'exp_corners_home': 0, 'exp_corners_away': 0, 'exp_corners_total': 0, 
-                    'exp_cards_home': 0, 'exp_cards_away': 0, 'exp_cards_total': 0}
-
-        # --- ESCANTEIOS (CANTOS) ---
-        # Média que o Mandante faz em casa
-        avg_corners_h_for = h_games.get('cantos_mandante', h_games['gols_mandante']*0).mean()
-        # Média que o Visitante SOFRE fora (são os cantos do mandante adversário)
-        avg_corners_a_against = a_games.get('cantos_mandante', a_games['gols_mandante']*0).mean()
-        
-        # Expectativa Casa: Média entre o que ele faz e o que o adversário sofre
-        exp_home_corners = (avg_corners_h_for + avg_corners_a_against) / 2
-        
-        # Média que o Visitante faz fora
-        avg_corners_a_for = a_games.get('cantos_visitante', a_games['gols_visitante']*0).mean()
-        # Média que o Mandante SOFRE em casa
-        avg_corners_h_against = h_games.get('cantos_visitante', h_games['gols_visitante']*0).mean()
-        
-        exp_away_corners = (avg_corners_a_for + avg_corners_h_against) / 2
-        
-        total_corners = exp_home_corners + exp_away_corners
+        counts = self.predict_counts([home_team], [away_team])
 
-        # --- CARTÕES (NOVO: Lógica detalhada) ---
-        # Cartões que o Mandante recebe em casa
-        cards_h = h_games.get('amarelos_mandante', h_games['gols_mandante']*0).mean() + \
-                  h_games.get('vermelhos_mandante', h_games['gols_mandante']*0).mean()
-        
-        # Cartões que o Visitante recebe fora
-        cards_a = a_games.get('amarelos_visitante', a_games['gols_visitante']*0).mean() + \
-                  a_games.get('vermelhos_visitante', a_games['gols_visitante']*0).mean()
+        if not counts['valid'][0]:
+            return {'exp_corners_home': 0, 'exp_corners_away': 0, 'exp_corners_total': 0,
+                    'exp_cards_home': 0, 'exp_cards_away': 0, 'exp_cards_total': 0,
+                    'corners_markets': {}, 'cards_markets': {}}
+
+        return {
+            'exp_corners_home': round(counts['exp_corners_home'][0], 2),
+            'exp_corners_away': round(counts['exp_corners_away'][0], 2),
+            'exp_corners_total': round(counts['exp_corners_total'][0], 2),
+            'exp_cards_home': round(counts['exp_cards_home'][0], 2), # Adicionado individual
+            'exp_cards_away': round(counts['exp_cards_away'][0], 2), # Adicionado individual
+            'exp_cards_total': round(counts['exp_cards_total'][0], 2),
+            'corners_markets': {k: v[0] for k, v in counts['corners_markets'].items()},
+            'cards_markets': {k: v[0] for k, v in counts['cards_markets'].items()}
+        }
+
+    @timed('engine.predict_counts')
+    def predict_counts(self, home_teams, away_teams):
+        """
+        Escanteios e cartões em lote: médias esperadas de cada jogo e escadas de over/under
+        (CORNER_LINES, CARD_LINES) com o total ~ Binomial Negativa, dispersão = média das
+        dispersões dos dois times. Jogos sem dados ficam NaN.
+        """
+        home_ids = self.encode(home_teams)
+        away_ids = self.encode(away_teams)
+        valid = (home_ids >= 0) & (away_ids >= 0)
+        valid[valid] = (self.home_games[home_ids[valid]] > 0) & (self.away_games[away_ids[valid]] > 0)
+
+        h, a = home_ids[valid], away_ids[valid]
+        col = self._col
+        h_means = self.home_means[h]
+        a_means = self.away_means[a]
 
-        total_cards = cards_h + cards_a
+        def fill(values):
+            full = np.full(len(valid), np.nan)
+            full[valid] = values
+            return full
+
+        # Cantos: média entre o que o time faz e o que o adversário sofre (casa x fora)
+        corners_home = fill((h_means[:, col['cantos_mandante']] + a_means[:, col['cantos_mandante']]) / 2)
+        corners_away = fill((a_means[:, col['cantos_visitante']] + h_means[:, col['cantos_visitante']]) / 2)
+        # Cartões: o que cada time recebe em casa / fora
+        cards_home = fill(h_means[:, col['amarelos_mandante']] + h_means[:, col['vermelhos_mandante']])
+        cards_away = fill(a_means[:, col['amarelos_visitante']] + a_means[:, col['vermelhos_visitante']])
+
+        alpha = np.full((len(valid), len(COUNT_STATS)), np.nan)
+        alpha[valid] = (self.dispersion[h] + self.dispersion[a]) / 2
+        stat = list(COUNT_STATS)
 
         return {
-            'exp_corners_home': round(exp_home_corners, 2),
-            'exp_corners_away': round(exp_away_corners, 2),
-            'exp_corners_total': round(total_corners, 2),
-            'exp_cards_home': round(cards_h, 2), # Adicionado individual
-            'exp_cards_away': round(cards_a, 2), # Adicionado individual
-            'exp_cards_total': round(total_cards, 2)
+            'valid': valid,
+            'exp_corners_home': corners_home,
+            'exp_corners_away': corners_away,
+            'exp_corners_total': corners_home + corners_away,
+            'exp_cards_home': cards_home,
+            'exp_cards_away': cards_away,
+            'exp_cards_total': cards_home + cards_away,
+            'corners_markets': count_ladder(corners_home + corners_away, alpha[:, stat.index('cantos')], CORNER_LINES),
+            'cards_markets': count_ladder(cards_home + cards_away, alpha[:, stat.index('cartoes')], CARD_LINES),
         }
 
+    @timed('engine.predict_match')
     def predict_match(self, home_team, away_team):
         # ... (Mantém igual, só garante que chama a função nova) ...
         home_stats = self.calculate_strength(home_team)
@@ -90,13 +330,14 @@ class StatisticalEngine:
         
         if not home_stats or not away_stats: return None
 
-        home_xg = home_stats['attack_home'] * away_stats['defense_away'] * self.league_avgs['home_goals']
-        away_xg = away_stats['attack_away'] * home_stats['defense_home'] * self.league_avgs['away_goals']
+        avgs = self.model.league_averages() if self.model is not None else self.league_avgs
+        home_xg = home_stats['attack_home'] * away_stats['defense_away'] * avgs['home_goals']
+        away_xg = away_stats['attack_away'] * home_stats['defense_home'] * avgs['away_goals']
 
-        probs = np.zeros((6, 6))
-        for h in range(6):
-            for a in range(6):
-                probs[h, a] = poisson.pmf(h, home_xg) * poisson.pmf(a, away_xg)
+        probs = score_matrices([home_xg], [away_xg])
+        if self.model is not None:
+            self.model.adjust(probs, home_xg, away_xg)
+        probs = probs[0]
 
         prob_home_win = np.sum(np.tril(probs, -1))
         prob_draw = np.sum(np.diag(probs))
@@ -113,4 +354,116 @@ class StatisticalEngine:
             'prob_away': round(prob_away_win * 100, 1),
             'score_matrix': probs,
             'secondary_metrics': secondary 
-        }
\ No newline at end of file
+        }
+
+    def all_pairings(self):
+        """Todos os confrontos N×(N-1) da liga (mandante, visitante) como arrays."""
+        n = len(self.teams)
+        home, away = np.nonzero(~np.eye(n, dtype=bool))
+        teams = np.array(self.teams, dtype=object)
+        return teams[home], teams[away]
+
+    @timed('engine.predict_matches')
+    def predict_matches(self, home_teams, away_teams):
+        """
+        Versão em lote do predict_match: recebe listas/arrays de mandantes e visitantes
+        e calcula todos os lambdas e matrizes de placar de uma vez (n_jogos, G, G).
+        Probabilidades em fração (0-1), sem arredondamento; jogos sem dados ficam NaN.
+        """
+        if self.model is not None:
+            lambda_home, lambda_away, valid = self.model.expected_goals(home_teams, away_teams)
+        else:
+            home_ids = self.encode(home_teams)
+            away_ids = self.encode(away_teams)
+
+            # Mesmo critério do calculate_strength: o time precisa ter jogado em casa e fora
+            playable = (self.home_games > 0) & (self.away_games > 0)
+            valid = (home_ids >= 0) & (away_ids >= 0)
+            valid[valid] = playable[home_ids[valid]] & playable[away_ids[valid]]
+
+            h, a = home_ids[valid], away_ids[valid]
+            lambda_home = np.full(len(valid), np.nan)
+            lambda_away = np.full(len(valid), np.nan)
+            lambda_home[valid] = self.attack_home[h] * self.defense_away[a] * self.league_avgs['home_goals']
+            lambda_away[valid] = self.attack_away[a] * self.defense_home[h] * self.league_avgs['away_goals']
+
+        matrices = score_matrices(lambda_home, lambda_away)
+        if self.model is not None:
+            self.model.adjust(matrices, lambda_home, lambda_away)
+        book = self.markets.evaluate(matrices)
+
+        return {
+            'home_team': np.asarray(home_teams, dtype=object),
+            'away_team': np.asarray(away_teams, dtype=object),
+            'valid': valid,
+            'lambda_home': lambda_home,
+            'lambda_away': lambda_away,
+            'prob_home': book['home'],
+            'prob_draw': book['draw'],
+            'prob_away': book['away'],
+            'prob_over_25': book['over_2.5'],
+            'prob_btts': book['btts_yes'],
+            'score_matrix': matrices,
+            'markets': book
+        }
+
+# --- Bloco de Teste (throughput: lote vs. loop de predict_match; update incremental) ---
+if __name__ == "__main__":
+    from src.processor import DataProcessor
+
+    df = DataProcessor().df
+    engine = StatisticalEngine(df)
+    homes, aways = engine.all_pairings()
+
+    start = time.perf_counter()
+    for home, away in zip(homes, aways):
+        engine.predict_match(home, away)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.predict_matches(homes, aways)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = engine.predict_counts(homes, aways)
+    counts_time = time.perf_counter() - start
+
+    n = len(homes)
+    print(f"⚽ {n} confrontos ({len(engine.teams)} times)")
+    print(f"🐢 Loop predict_match: {loop_time:.3f}s ({n / loop_time:,.0f} jogos/s)")
+    print(f"🚀 predict_matches:    {batch_time:.4f}s ({n / batch_time:,.0f} jogos/s) -> {loop_time / batch_time:.0f}x")
+
+    print(f"🚩 predict_counts:     {counts_time:.4f}s ({n / counts_time:,.0f} jogos/s, "
+          f"{len(counts['corners_markets']) + len(counts['cards_markets'])} linhas de cantos/cartões)")
+    print(f"📐 Dispersão da liga (cantos, cartões): {np.round(engine.league_dispersion, 4)}")
+
+    # Update incremental: a última rodada absorvida deve dar exatamente o motor completo
+    cut = len(df) - 10
+    incremental = StatisticalEngine(df.iloc[:cut])
+    start = time.perf_counter()
+    incremental.update(df.iloc[cut:])
+    update_time = time.perf_counter() - start
+    assert incremental.teams == engine.teams
+    assert incremental.league_avgs == engine.league_avgs
+    for name in ('home_means', 'away_means', 'home_games', 'away_games',
+                 'attack_home', 'defense_home', 'attack_away', 'defense_away'):
+        assert np.array_equal(getattr(incremental, name), getattr(engine, name), equal_nan=True), name
+    for home, away in zip(homes, aways):
+        assert incremental.predict_match(home, away)['prob_home'] == engine.predict_match(home, away)['prob_home']
+    for name in ('_team_moments', 'dispersion'):
+        assert np.allclose(getattr(incremental, name), getattr(engine, name), equal_nan=True), name
+    print(f"🔁 update() com 10 jogos idêntico à reconstrução completa ({update_time * 1000:.1f} ms)")
+
+    # Linha em branco no fim do CSV (sem times): ignorada, mesmo resultado que sem ela
+    import shutil
+    import tempfile
+    with tempfile.TemporaryDirectory() as root:
+        blank_csv = f"{root}/com_linha_vazia.csv"
+        shutil.copyfile(DataProcessor().raw_data_path, blank_csv)
+        with open(blank_csv, 'a') as f:
+            f.write(",,,,,,,,,,\n")
+        with_blank = StatisticalEngine(DataProcessor(blank_csv, processed_dir=None).df)
+    assert with_blank.teams == engine.teams
+    assert with_blank.league_avgs == engine.league_avgs
+    assert with_blank.predict_match(homes[0], aways[0])['prob_home'] == engine.predict_match(homes[0], aways[0])['prob_home']
+    print("🧹 Linha sem times ignorada pelo motor")
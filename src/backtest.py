@@ -0,0 +1,186 @@
+import time
+import numpy as np
+import pandas as pd
+from src.analyzer import StatisticalEngine
+from src.markets import ODDS_SELECTIONS, asian_handicap_profit
+from src.profiling import timed
+
+class WalkForwardBacktest:
+    """
+    Replay de uma temporada em ordem de data: cada rodada é prevista só com os jogos
+    anteriores ao pontapé inicial e depois absorvida pelo motor via StatisticalEngine.update,
+    então o estimador de médias custa O(jogos) no replay todo. O modelo Dixon-Coles (ratings)
+    é reajustado no histórico inteiro só a cada `refit_days` dias (custo O(jogos × reajustes),
+    não O(jogos × datas)); entre reajustes as previsões usam o último ajuste.
+    As odds justas (1 / probabilidade, como no BetAdvisor) são comparadas às odds guardadas
+    no CSV (DataProcessor(..., odds=True)); aposta-se 1 unidade quando o valor esperado
+    supera min_edge.
+    """
+
+    def __init__(self, df, price_source='media', min_edge=0.0, min_games=4, ratings=None, refit_days=7):
+        """
+        :param df: Temporada com odds (DataProcessor(..., odds=True).df)
+        :param price_source: Bookmaker das odds: 'media', 'pinnacle' ou 'b365'
+        :param min_edge: Valor esperado mínimo por unidade para apostar (ex: 0.05 = 5%)
+        :param min_games: Jogos mínimos de cada time antes de começar a prever
+        :param ratings: kwargs de DixonColesModel para usar o modelo ajustado (reajustes com warm start)
+        :param refit_days: Dias mínimos entre reajustes do modelo (7 ~ um por rodada)
+        """
+        self.df = df.sort_values('data', kind='stable').reset_index(drop=True)
+        self.price_source = price_source
+        self.min_edge = min_edge
+        self.min_games = min_games
+        self.ratings = ratings
+        self.refit_days = refit_days
+        self.bets = None
+        self.report = None
+        self.elapsed = None
+
+    def _odds(self, column):
+        """Odds de uma coluna (NaN se o CSV não tiver o bookmaker/mercado)."""
+        name = f"odd_{self.price_source}_{column}"
+        return self.df[name].to_numpy(dtype=float) if name in self.df else np.full(len(self.df), np.nan)
+
+    def _closing(self, column):
+        name = f"odd_{self.price_source}_{column}_fech"
+        if name not in self.df:
+            name = f"odd_media_{column}_fech"
+        return self.df[name].to_numpy(dtype=float) if name in self.df else np.full(len(self.df), np.nan)
+
+    def _replay(self):
+        """Probabilidades do modelo para cada jogo, usando só o passado de cada data."""
+        engine_cols = [c for c in self.df.columns if not c.startswith(('odd_', 'ah_'))]
+        engine = StatisticalEngine(self.df.iloc[:0][engine_cols])
+        n = len(self.df)
+        probs = {key: np.full(n, np.nan) for _, sels in ODDS_SELECTIONS.items() for _, key, _ in sels}
+        ev_ah = np.full((n, 2), np.nan)
+        valid = np.zeros(n, dtype=bool)
+
+        lines = self.df['ah_linha'].to_numpy(dtype=float) if 'ah_linha' in self.df else np.full(n, np.nan)
+        odds_ah = np.column_stack([self._odds('ah_casa'), self._odds('ah_fora')])
+
+        last_fit = None
+        for date, day in self.df.groupby('data', sort=True):
+            rows = day.index.to_numpy()
+            if len(engine.teams):
+                homes, aways = day['mandante'].astype(str), day['visitante'].astype(str)
+                prediction = engine.predict_matches(homes, aways)
+                # Jogos disputados por time; a posição extra (índice -1) é o time ainda sem jogos
+                played = np.append(engine.home_games + engine.away_games, 0)
+                home_ids = engine.encode(homes)
+                away_ids = engine.encode(aways)
+                ok = (prediction['valid'] & (played[home_ids] >= self.min_games)
+                      & (played[away_ids] >= self.min_games))
+
+                book = prediction['markets']
+                for key in probs:
+                    probs[key][rows] = np.where(ok, book[key], np.nan)
+                has_line = ok & np.isfinite(lines[rows])
+                if has_line.any():
+                    ev_home, ev_away = engine.markets.asian_handicap_ev(
+                        prediction['score_matrix'][has_line], lines[rows][has_line],
+                        odds_ah[rows, 0][has_line], odds_ah[rows, 1][has_line])
+                    ev_ah[rows[has_line]] = np.column_stack([ev_home, ev_away])
+                valid[rows] = ok
+
+            refit = engine.model is not None and (date - last_fit).days >= self.refit_days
+            engine.update(day[engine_cols], refit=refit)
+            if self.ratings is not None and engine.model is None:
+                engine.fit_ratings(**self.ratings)
+                refit = True
+            if refit:
+                last_fit = date
+        return probs, ev_ah, valid
+
+    @timed('backtest.run')
+    def run(self):
+        """Executa o replay e monta as apostas e o relatório por mercado."""
+        start = time.perf_counter()
+        probs, ev_ah, valid = self._replay()
+        elapsed = time.perf_counter() - start
+
+        goals_home = self.df['gols_mandante'].to_numpy(dtype=float)
+        goals_away = self.df['gols_visitante'].to_numpy(dtype=float)
+        outcomes = {
+            'home': goals_home > goals_away, 'draw': goals_home == goals_away, 'away': goals_home < goals_away,
+            'over_2.5': goals_home + goals_away > 2.5, 'under_2.5': goals_home + goals_away < 2.5,
+        }
+
+        bets, report = [], []
+        for market, selections in ODDS_SELECTIONS.items():
+            p = np.column_stack([probs[key] for _, key, _ in selections])
+            y = np.column_stack([outcomes[key] for _, key, _ in selections])
+            odds = np.column_stack([self._odds(col) for _, _, col in selections])
+            closing = np.column_stack([self._closing(col) for _, _, col in selections])
+
+            scored = valid & np.isfinite(p).all(axis=1)
+            p_actual = np.clip((p * y).sum(axis=1), 1e-15, 1)
+            log_loss = -np.mean(np.log(p_actual[scored])) if scored.any() else np.nan
+            brier = np.mean(((p - y) ** 2).sum(axis=1)[scored]) if scored.any() else np.nan
+
+            ev = p * odds - 1
+            take = scored[:, None] & np.isfinite(ev) & (ev > self.min_edge)
+            profit = np.where(y, odds - 1, -1.0)
+            for j, (label, _, _) in enumerate(selections):
+                for i in np.flatnonzero(take[:, j]):
+                    bets.append(self._bet(i, market, label, p[i, j], odds[i, j], ev[i, j],
+                                          profit[i, j], odds[i, j] / closing[i, j] - 1))
+            report.append(self._summary(market, scored.sum(), take, profit,
+                                        odds / closing - 1, log_loss, brier))
+
+        # Handicap Asiático: liquidação com meia-vitória/devolução nas linhas de quarto
+        lines = self.df['ah_linha'].to_numpy(dtype=float) if 'ah_linha' in self.df else np.full(len(self.df), np.nan)
+        closing_lines = self.df['ah_linha_fech'].to_numpy(dtype=float) if 'ah_linha_fech' in self.df else lines
+        odds = np.column_stack([self._odds('ah_casa'), self._odds('ah_fora')])
+        closing = np.column_stack([self._closing('ah_casa'), self._closing('ah_fora')])
+        diff = goals_home - goals_away
+        profit = np.column_stack([asian_handicap_profit(diff, lines, odds[:, 0]),
+                                  asian_handicap_profit(-diff, -lines, odds[:, 1])])
+        # CLV só é comparável quando a linha de fechamento é a mesma
+        clv = np.where((closing_lines == lines)[:, None], odds / closing - 1, np.nan)
+        take = valid[:, None] & np.isfinite(ev_ah) & (ev_ah > self.min_edge)
+        for j, label in enumerate(('Casa', 'Fora')):
+            for i in np.flatnonzero(take[:, j]):
+                side_line = lines[i] if j == 0 else -lines[i]
+                bets.append(self._bet(i, 'Handicap Asiático', f"{label} {side_line:+g}", np.nan,
+                                      odds[i, j], ev_ah[i, j], profit[i, j], clv[i, j]))
+        report.append(self._summary('Handicap Asiático', int((valid & np.isfinite(lines)).sum()),
+                                    take, profit, clv, np.nan, np.nan))
+
+        self.bets = pd.DataFrame(bets)
+        self.report = pd.DataFrame(report)
+        self.elapsed = elapsed
+        return self.report
+
+    def _bet(self, i, market, selection, prob, odd, ev, profit, clv):
+        row = self.df.iloc[i]
+        return {
+            'data': row['data'], 'jogo': f"{row['mandante']} vs {row['visitante']}",
+            'mercado': market, 'selecao': selection,
+            'probabilidade': prob, 'odd_justa': 1 / prob if prob and np.isfinite(prob) else np.nan,
+            'odd': odd, 'valor_esperado': ev, 'lucro': profit, 'clv': clv
+        }
+
+    @staticmethod
+    def _summary(market, evaluated, take, profit, clv, log_loss, brier):
+        stakes = int(take.sum())
+        realized = profit[take]
+        return {
+            'mercado': market, 'jogos_avaliados': int(evaluated), 'apostas': stakes,
+            'acertos': int((realized > 0).sum()),
+            'taxa_acerto': (realized > 0).mean() if stakes else np.nan,
+            'lucro': realized.sum(), 'roi': realized.sum() / stakes if stakes else np.nan,
+            'log_loss': log_loss, 'brier': brier,
+            'clv_medio': np.nanmean(clv[take]) if stakes and np.isfinite(clv[take]).any() else np.nan,
+        }
+
+# --- Bloco de Teste ---
+if __name__ == "__main__":
+    from src.processor import DataProcessor
+
+    df = DataProcessor("data/premier_league_2324.csv", odds=True).df
+    for label, backtest in (("Médias", WalkForwardBacktest(df, min_edge=0.05)),
+                            ("Dixon-Coles", WalkForwardBacktest(df, min_edge=0.05, ratings={'xi': 0.002}))):
+        relatorio = backtest.run()
+        print(f"\n📊 Backtest {label} ({len(df)} jogos em {backtest.elapsed:.2f}s)")
+        print(relatorio.round(3).to_string(index=False))
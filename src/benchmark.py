@@ -0,0 +1,225 @@
+import argparse
+import contextlib
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.processor import DataProcessor
+from src.analyzer import StatisticalEngine
+from src.predictor import BetAdvisor
+from src.profiling import StageTimer
+
+RESULTS_DIR = "data/benchmarks"
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Pontos de entrada medidos no relatório de importação (python -X importtime)
+IMPORT_MODULES = ['main', 'src.data_loader', 'src.analyzer', 'src.predictor', 'src.ratings', 'src.server']
+
+def synthetic_league(n_teams, n_seasons=1, seed=0):
+    """
+    Liga sintética no formato bruto do Football-Data (colunas de COL_MAP): turno e returno
+    por temporada, gols Poisson a partir de forças aleatórias e cantos/cartões/chutes plausíveis.
+    """
+    rng = np.random.default_rng(seed)
+    teams = np.array([f"Time {i:03d}" for i in range(n_teams)])
+    attack = rng.normal(0, 0.25, n_teams)
+    defense = rng.normal(0, 0.25, n_teams)
+    home, away = np.nonzero(~np.eye(n_teams, dtype=bool))
+    n_games = len(home)
+
+    seasons = []
+    for season in range(n_seasons):
+        # Jogos espalhados em 2*(N-1) rodadas semanais a partir de agosto
+        rounds = rng.integers(0, 2 * (n_teams - 1), n_games)
+        dates = pd.Timestamp(f"{2015 + season}-08-01") + pd.to_timedelta(rounds * 7, unit='D')
+        goals_home = rng.poisson(np.exp(0.35 + attack[home] - defense[away]))
+        goals_away = rng.poisson(np.exp(0.10 + attack[away] - defense[home]))
+        seasons.append(pd.DataFrame({
+            'Date': dates.strftime('%d/%m/%Y'), 'HomeTeam': teams[home], 'AwayTeam': teams[away],
+            'FTHG': goals_home, 'FTAG': goals_away,
+            'FTR': np.select([goals_home > goals_away, goals_home < goals_away], ['H', 'A'], 'D'),
+            'HST': rng.poisson(4.8, n_games), 'AST': rng.poisson(4.0, n_games),
+            'HC': rng.negative_binomial(20, 20 / 25.6, n_games), 'AC': rng.negative_binomial(20, 20 / 24.5, n_games),
+            'HY': rng.poisson(1.8, n_games), 'AY': rng.poisson(2.0, n_games),
+            'HR': rng.poisson(0.06, n_games), 'AR': rng.poisson(0.08, n_games),
+        }).sort_values('Date', kind='stable', key=lambda d: pd.to_datetime(d, dayfirst=True)))
+    return pd.concat(seasons, ignore_index=True)
+
+def measure(func, repeat=5):
+    """Tempo (mínimo e mediana de `repeat` execuções) e pico de memória (tracemalloc, execução à parte)."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'min_s': min(times), 'mediana_s': statistics.median(times), 'pico_mb': peak / 2 ** 20}
+
+def benchmark_dataset(name, csv_path, repeat=5, sample=100):
+    """Mede todas as etapas para um CSV: leitura (CSV e Parquet), motor, previsões e todos os pares."""
+    results = []
+
+    def record(stage, func, calls=1, rep=repeat):
+        stats = measure(func, rep)
+        stats.update({'dataset': name, 'etapa': stage, 'chamadas': calls,
+                      'por_chamada_ms': stats['mediana_s'] / calls * 1000})
+        results.append(stats)
+
+    record('load_and_clean (csv)', lambda: DataProcessor(str(csv_path), processed_dir=None))
+    with tempfile.TemporaryDirectory() as store:
+        DataProcessor(str(csv_path), processed_dir=store)
+        record('load_and_clean (parquet)', lambda: DataProcessor(str(csv_path), processed_dir=store))
+
+    df = DataProcessor(str(csv_path), processed_dir=None).df
+    record('engine_build', lambda: StatisticalEngine(df))
+
+    engine = StatisticalEngine(df)
+    advisor = BetAdvisor(engine)
+    homes, aways = engine.all_pairings()
+    pick = np.random.default_rng(0).permutation(len(homes))[:sample]
+    pairs = list(zip(homes[pick], aways[pick]))
+
+    record('predict_match', lambda: [engine.predict_match(h, a) for h, a in pairs], calls=len(pairs))
+    record('get_match_suggestion', lambda: [advisor.get_match_suggestion(h, a) for h, a in pairs], calls=len(pairs))
+    record('all_pairs (predict_matches)', lambda: engine.predict_matches(homes, aways), calls=len(homes))
+    record('all_pairs (predict_counts)', lambda: engine.predict_counts(homes, aways), calls=len(homes))
+
+    for r in results:
+        r.update({'times': len(engine.teams), 'jogos': len(df)})
+    return results
+
+def import_times(modules=IMPORT_MODULES, repeat=3, top=5):
+    """
+    Importação a frio de cada módulo num processo novo (python -X importtime, melhor de `repeat`).
+    :return: {módulo: {'total_ms', 'pacotes_ms': os `top` pacotes mais caros}}
+    """
+    report = {}
+    for module in modules:
+        best = None
+        for _ in range(repeat):
+            stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                    capture_output=True, text=True, cwd=REPO_ROOT).stderr
+            # Linhas "import time: self | cumulativo | nome" (µs); a indentação do nome é a profundidade
+            rows = []
+            for line in stderr.splitlines():
+                if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+                    _, cumulative, name = line[len('import time:'):].split('|')
+                    rows.append((name.strip(), int(cumulative)))
+            total = next((us for name, us in reversed(rows) if name == module), None)
+            if total is None:
+                raise RuntimeError(f"Falha ao importar {module}: {stderr.strip().splitlines()[-1]}")
+            if best is None or total < best[0]:
+                best = (total, rows)
+
+        total, rows = best
+        packages = {name: us / 1000 for name, us in rows if '.' not in name and not name.startswith('_')}
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+        report[module] = {'total_ms': total / 1000, 'pacotes_ms': dict(heaviest)}
+    return report
+
+def _metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'data': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'plataforma': platform.platform()}
+
+def run_suite(datasets=None, teams=(20, 50, 100, 200), seasons=5, repeat=5, stages=False):
+    """
+    Executa a suíte: CSVs de data/ mais ligas sintéticas de `teams` times e um histórico
+    de `seasons` temporadas (20 times). Com stages=True inclui o tempo interno de cada etapa
+    instrumentada (src.profiling).
+    :return: Dicionário serializável {'meta': ..., 'resultados': [...], 'etapas': {...}}
+    """
+    datasets = sorted(Path("data").glob("*.csv")) if datasets is None else datasets
+    timer = StageTimer()
+    results = []
+    with tempfile.TemporaryDirectory() as root, (timer if stages else contextlib.nullcontext()):
+        jobs = [(Path(p).stem, Path(p)) for p in datasets]
+        for n in teams:
+            path = Path(root) / f"sintetica_{n}_times.csv"
+            synthetic_league(n).to_csv(path, index=False)
+            jobs.append((path.stem, path))
+        if seasons:
+            path = Path(root) / f"sintetica_20_times_{seasons}_temporadas.csv"
+            synthetic_league(20, n_seasons=seasons).to_csv(path, index=False)
+            jobs.append((path.stem, path))
+
+        for name, path in jobs:
+            print(f"⏳ {name} ...")
+            results.extend(benchmark_dataset(name, path, repeat=repeat))
+    return {'meta': _metadata(), 'resultados': results, 'etapas': timer.summary() if stages else {}}
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Compara duas execuções (mesmo dataset e etapa) pela mediana.
+    :return: DataFrame com a razão atual/base; 'regressao' marca quem piorou mais que `tolerance`
+    """
+    key = ['dataset', 'etapa']
+    now = pd.DataFrame(current['resultados']).set_index(key)
+    before = pd.DataFrame(baseline['resultados']).set_index(key)
+    table = now[['mediana_s', 'pico_mb']].join(before[['mediana_s', 'pico_mb']], rsuffix='_base', how='inner')
+    table['razao'] = table['mediana_s'] / table['mediana_s_base']
+    table['regressao'] = table['razao'] > 1 + tolerance
+    return table.reset_index()
+
+# --- Execução: python -m src.benchmark [--quick] [--out arquivo.json] [--compare base.json] ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks (carga, motor, previsões).")
+    parser.add_argument('--quick', action='store_true', help="Só 20 e 50 times, 3 temporadas, 3 repetições")
+    parser.add_argument('--teams', type=int, nargs='+', default=[20, 50, 100, 200])
+    parser.add_argument('--seasons', type=int, default=5, help="Temporadas do histórico sintético (0 desliga)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--stages', action='store_true', help="Inclui o tempo interno de cada etapa instrumentada")
+    parser.add_argument('--out', default=f"{RESULTS_DIR}/benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Piora relativa tolerada na comparação")
+    parser.add_argument('--imports', action='store_true', help="Só o relatório de tempo de importação a frio")
+    args = parser.parse_args()
+    if args.quick:
+        args.teams, args.seasons, args.repeat = [20, 50], 3, 3
+
+    if args.imports:
+        print("📦 Importação a frio (python -X importtime, melhor de 3):")
+        for module, info in import_times().items():
+            pacotes = ", ".join(f"{name} {ms:.0f}" for name, ms in info['pacotes_ms'].items())
+            print(f"   {module:<16} {info['total_ms']:7.1f} ms | {pacotes}")
+        sys.exit(0)
+
+    report = run_suite(teams=args.teams, seasons=args.seasons, repeat=args.repeat, stages=args.stages)
+    report['importacao'] = import_times()
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    table = pd.DataFrame(report['resultados'])
+    pd.set_option('display.width', 200)
+    print(table[['dataset', 'times', 'jogos', 'etapa', 'mediana_s', 'por_chamada_ms', 'pico_mb']]
+          .round(4).to_string(index=False))
+    if report['etapas']:
+        print("\n🔬 Etapas instrumentadas:")
+        for stage, info in report['etapas'].items():
+            print(f"   {stage:<32} {info['chamadas']:>7} chamadas | {info['total_s']:.3f}s")
+    print(f"\n💾 Resultados em {args.out}")
+
+    if args.compare:
+        diff = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        print(f"\n📊 Comparação com {args.compare}:")
+        print(diff[['dataset', 'etapa', 'mediana_s_base', 'mediana_s', 'razao', 'regressao']].round(3).to_string(index=False))
+        regressions = int(diff['regressao'].sum())
+        print(f"{'⚠️' if regressions else '✅'} {regressions} regressão(ões) acima de {args.tolerance:.0%}")
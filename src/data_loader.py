@@ -1,13 +1,25 @@
-import pandas as pd
+import json
+import shutil
+import tempfile
+import time
+import urllib.error
+import urllib.request
 from pathlib import Path
+from src.profiling import timed
 
 class DataLoader:
     """
     Gerencia a coleta de dados de múltiplas ligas via Football-Data.co.uk.
+    Os downloads passam por um cache local (data/cache) revalidado com ETag/Last-Modified.
     """
-    
-    BASE_URL = "https://www.football-data.co.uk/mmz4281/2526/{}.csv"
-    
+
+    BASE_URL = "https://www.football-data.co.uk/mmz4281/{season}/{code}.csv"
+    SEASON = "2526"
+
+    # Cache local: dentro do TTL nem consulta o servidor; depois revalida com GET condicional
+    CACHE_DIR = "data/cache"
+    CACHE_TTL = 6 * 60 * 60  # segundos
+
     # Dicionário de Ligas Disponíveis (Nome: Código)
     LEAGUES = {
         "Premier League (Inglaterra)": "E0",
@@ -19,41 +31,201 @@ class DataLoader:
         "Liga Portugal (Portugal)": "P1",
         "Eredivisie (Holanda)": "N1"
     }
-    
-    def __init__(self):
+
+    def __init__(self, base_url=None, cache_dir=None, ttl=None, timeout=30):
+        """
+        :param base_url: Modelo da URL com {season} e {code} (permite apontar para um servidor local)
+        :param cache_dir: Pasta do cache de downloads
+        :param ttl: Segundos em que o cache é usado sem revalidar (0 = sempre revalida)
+        """
+        self.base_url = base_url or self.BASE_URL
+        self.cache_dir = Path(cache_dir or self.CACHE_DIR)
+        self.ttl = self.CACHE_TTL if ttl is None else ttl
+        self.timeout = timeout
         self.raw_data = None
-        
-    def load_data(self, league_name):
+        self.cache_file = None
+        self.season = self.SEASON
+
+    def _cache_paths(self, code, season):
+        """Arquivo CSV e metadados (ETag, Last-Modified, horário) de uma liga/temporada."""
+        stem = f"{code}_{season}"
+        return self.cache_dir / f"{stem}.csv", self.cache_dir / f"{stem}.json"
+
+    @timed('loader.fetch')
+    def fetch(self, code, season=None):
+        """
+        Garante uma cópia local do CSV de uma liga/temporada e retorna o caminho.
+        - Cache dentro do TTL: leitura local, sem rede.
+        - Cache vencido: GET condicional (If-None-Match / If-Modified-Since); 304 reaproveita o arquivo.
+        - Falha de rede: usa a cópia em cache (modo offline), se existir.
+        """
+        season = season or self.SEASON
+        csv_path, meta_path = self._cache_paths(code, season)
+        meta = self._read_meta(meta_path) if csv_path.exists() else {}
+
+        if meta and time.time() - meta.get('fetched_at', 0) < self.ttl:
+            print(f"📦 Cache válido: {csv_path}")
+            return csv_path
+
+        url = self.base_url.format(season=season, code=code)
+        request = urllib.request.Request(url, headers={'User-Agent': 'futebol-analitico'})
+        if meta.get('etag'):
+            request.add_header('If-None-Match', meta['etag'])
+        if meta.get('last_modified'):
+            request.add_header('If-Modified-Since', meta['last_modified'])
+
+        print(f"🔄 Verificando dados: {url} ...")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                print("✅ Sem alterações no servidor, usando o cache.")
+                meta['fetched_at'] = time.time()
+                self._write_atomic(meta_path, json.dumps(meta).encode())
+                return csv_path
+            return self._offline_fallback(csv_path, e)
+        except (urllib.error.URLError, OSError) as e:
+            return self._offline_fallback(csv_path, e)
+
+        # Grava primeiro num temporário para nunca deixar um CSV pela metade no cache
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._write_atomic(csv_path, body)
+        self._write_atomic(meta_path, json.dumps({
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time()
+        }).encode())
+        return csv_path
+
+    @staticmethod
+    def _read_meta(meta_path):
+        """Metadados do cache ({} se não existirem ou estiverem ilegíveis: força a revalidação)."""
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return meta if isinstance(meta, dict) else {}
+
+    @staticmethod
+    def _write_atomic(path, data):
+        """
+        Grava num temporário de nome único na pasta do cache e troca pelo destino: downloads
+        concorrentes da mesma liga (ex: /reload e a atualização periódica do servidor) não se atropelam.
+        """
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp',
+                                         delete=False) as tmp:
+            tmp.write(data)
+        try:
+            Path(tmp.name).replace(path)
+        except OSError:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+
+    def _offline_fallback(self, csv_path, error):
+        if csv_path.exists():
+            print(f"⚠️ Sem conexão ({error}). Usando cópia em cache: {csv_path}")
+            return csv_path
+        print(f"❌ Erro ao baixar dados: {error}")
+        return None
+
+    @staticmethod
+    def season_range(season, n_seasons):
+        """As n temporadas terminando em `season`, da mais antiga para a atual (ex: '2526', 3 -> ['2324', '2425', '2526'])."""
+        start = int(season[:2])
+        return [f"{(start - k) % 100:02d}{(start - k + 1) % 100:02d}" for k in reversed(range(n_seasons))]
+
+    def load_seasons(self, league_name, n_seasons=1, season=None):
+        """
+        Garante cópias locais das últimas n temporadas de uma liga.
+        :return: Dicionário {temporada: caminho do CSV}, só com as que foram obtidas
+        """
+        code = self.LEAGUES.get(league_name)
+        if not code:
+            print(f"❌ Liga '{league_name}' não encontrada.")
+            return {}
+
+        paths = {}
+        for s in self.season_range(season or self.SEASON, n_seasons):
+            path = self.fetch(code, s)
+            if path is not None:
+                paths[s] = path
+        return paths
+
+    def load_data(self, league_name, season=None):
         """
         Baixa os dados da liga selecionada.
         :param league_name: Chave do dicionário LEAGUES (ex: 'La Liga (Espanha)')
+        :param season: Temporada no formato do Football-Data (ex: '2324'); None = atual
         """
         code = self.LEAGUES.get(league_name)
         if not code:
             print(f"❌ Liga '{league_name}' não encontrada.")
             return None
 
-        url = self.BASE_URL.format(code)
-        print(f"🔄 Baixando dados da {league_name}: {url} ...")
-        
+        self.season = season or self.SEASON
+        self.cache_file = self.fetch(code, self.season)
+        if self.cache_file is None:
+            self.raw_data = None
+            return None
+
         try:
-            self.raw_data = pd.read_csv(url)
-            print(f"✅ Download concluído! {len(self.raw_data)} jogos carregados.")
+            import pandas as pd  # importado só aqui: o menu e o cache não precisam do pandas
+            self.raw_data = pd.read_csv(self.cache_file)
+            print(f"✅ Dados prontos! {len(self.raw_data)} jogos carregados.")
             return self.raw_data
         except Exception as e:
-            print(f"❌ Erro ao baixar dados: {e}")
+            print(f"❌ Erro ao ler dados: {e}")
+            self.raw_data = None
             return None
 
     def save_local(self, league_name):
-        """Salva o arquivo com um nome específico para cada liga."""
+        """Salva o arquivo com um nome específico para cada liga (só regrava se o cache mudou)."""
         if self.raw_data is not None:
             Path("data").mkdir(exist_ok=True)
-            
+
             # Cria um nome de arquivo seguro (ex: la_liga_espanha_2526.csv)
             safe_name = league_name.lower().replace(" ", "_").replace("(", "").replace(")", "")
-            filename = f"data/{safe_name}_2526.csv"
-            
-            self.raw_data.to_csv(filename, index=False)
+            filename = f"data/{safe_name}_{self.season}.csv"
+            target = Path(filename)
+
+            if self.cache_file is not None:
+                if target.exists() and target.stat().st_mtime >= self.cache_file.stat().st_mtime:
+                    print(f"💾 Arquivo já atualizado: {filename}")
+                    return filename
+                shutil.copyfile(self.cache_file, target)
+            else:
+                self.raw_data.to_csv(filename, index=False)
             print(f"💾 Arquivo salvo em: {filename}")
             return filename
-        return None
\ No newline at end of file
+        return None
+
+# --- Bloco de Teste (servidor HTTP local no lugar do Football-Data) ---
+if __name__ == "__main__":
+    import threading
+    from functools import partial
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+    with tempfile.TemporaryDirectory() as root:
+        season_dir = Path(root) / DataLoader.SEASON
+        season_dir.mkdir()
+        shutil.copyfile("data/premier_league_2526.csv", season_dir / "E0.csv")
+
+        handler = partial(SimpleHTTPRequestHandler, directory=root)
+        server = HTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}/{{season}}/{{code}}.csv"
+
+        loader = DataLoader(base_url=base_url, cache_dir=Path(root) / "cache", ttl=0)
+        for step in ("1º acesso (200)", "2º acesso (304)"):
+            start = time.perf_counter()
+            loader.fetch("E0")
+            print(f"⏱️ {step}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        server.shutdown()
+        server.server_close()
+        start = time.perf_counter()
+        loader.fetch("E0")
+        print(f"⏱️ Offline (fallback): {(time.perf_counter() - start) * 1000:.1f} ms")
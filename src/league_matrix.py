@@ -0,0 +1,194 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from src.processor import PROCESSED_DIR, DataProcessor, data_version
+from src.profiling import timed
+
+# Campos da matriz N×N (mandante na linha, visitante na coluna)
+MATRIX_FIELDS = ['prob_casa', 'prob_empate', 'prob_fora', 'xg_casa', 'xg_fora', 'prob_over_25']
+MATRIX_VERSION = 2  # muda quando o formato do artefato muda (força reconstrução)
+
+class LeagueMatrix:
+    """
+    Todos os confrontos de uma liga pré-calculados numa passada: tensor (campos, N, N) com
+    1X2, xG e Over 2.5. Gravado como .npy (+ .json com times, versão dos dados e o .npy) e lido por
+    memory-map, então uma consulta é só um índice no arquivo mapeado (microssegundos).
+    O .npy é usado no lugar do .npz porque np.load não mapeia membros de um .npz.
+    """
+
+    def __init__(self, teams, values, version=None, code=None):
+        """
+        :param teams: Nomes dos times na ordem das linhas/colunas
+        :param values: Array (len(MATRIX_FIELDS), N, N); a diagonal é NaN
+        """
+        self.teams = list(teams)
+        self.team_ids = {team: i for i, team in enumerate(self.teams)}
+        self.values = values
+        self.version = version
+        self.code = code
+
+    @classmethod
+    @timed('matrix.build')
+    def build(cls, engine, version=None, code=None):
+        """Calcula a matriz a partir de um StatisticalEngine (um único predict_matches sobre N×(N-1) jogos)."""
+        n = len(engine.teams)
+        homes, aways = engine.all_pairings()
+        prediction = engine.predict_matches(homes, aways)
+
+        values = np.full((len(MATRIX_FIELDS), n, n), np.nan, dtype=np.float32)
+        rows, cols = engine.encode(homes), engine.encode(aways)
+        sources = {'prob_casa': 'prob_home', 'prob_empate': 'prob_draw', 'prob_fora': 'prob_away',
+                   'xg_casa': 'lambda_home', 'xg_fora': 'lambda_away', 'prob_over_25': 'prob_over_25'}
+        for k, field in enumerate(MATRIX_FIELDS):
+            values[k, rows, cols] = prediction[sources[field]]
+        return cls(engine.teams, values, version, code)
+
+    @staticmethod
+    def meta_path(directory, name):
+        return Path(directory) / f"matriz_{name}.json"
+
+    def save(self, directory, name):
+        """
+        Grava o tensor num .npy próprio da versão dos dados e depois troca o .json (times +
+        nome do .npy) atomicamente: quem lê o .json sempre abre o tensor da mesma gravação.
+        """
+        meta_path = self.meta_path(directory, name)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        array_path = meta_path.with_name(f"matriz_{name}.{self.version or 'local'}.npy")
+        tmp_path = array_path.with_suffix('.tmp.npy')
+        np.save(tmp_path, np.ascontiguousarray(self.values))
+        tmp_path.replace(array_path)
+
+        tmp_meta = meta_path.with_suffix('.tmp.json')
+        tmp_meta.write_text(json.dumps({'times': self.teams, 'campos': MATRIX_FIELDS, 'versao_dados': self.version,
+                                        'versao': MATRIX_VERSION, 'liga': self.code, 'arquivo': array_path.name},
+                                       ensure_ascii=False))
+        tmp_meta.replace(meta_path)
+        # Tensores de versões anteriores (leitores que já os mapearam continuam válidos no POSIX)
+        for stale in [meta_path.with_suffix('.npy'), *meta_path.parent.glob(f"matriz_{name}.*.npy")]:
+            if stale.name != array_path.name and not stale.name.endswith('.tmp.npy'):
+                stale.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, directory, name):
+        """Abre um artefato gravado por memory-map (ou None se não existir / for de outro formato)."""
+        meta_path = cls.meta_path(directory, name)
+        for _ in range(2):  # o .npy some se outra gravação trocar a versão entre as duas leituras
+            if not meta_path.exists():
+                return None
+            meta = json.loads(meta_path.read_text())
+            if meta.get('versao') != MATRIX_VERSION or meta.get('campos') != MATRIX_FIELDS:
+                return None
+            try:
+                values = np.load(meta_path.with_name(meta['arquivo']), mmap_mode='r')
+            except FileNotFoundError:
+                continue
+            return cls(meta['times'], values, meta['versao_dados'], meta.get('liga'))
+        return None
+
+    @classmethod
+    def load_or_build(cls, csv_path, directory=PROCESSED_DIR, code=None, engine=None):
+        """
+        Matriz da liga de um CSV: reaproveita o artefato se a versão dos dados não mudou,
+        senão reconstrói (com `engine`, se dado, ou montando um motor a partir do CSV) e regrava.
+        """
+        from src.analyzer import StatisticalEngine
+
+        name = code or Path(csv_path).stem
+        version = data_version(csv_path)
+        matrix = cls.load(directory, name)
+        if matrix is not None and matrix.version == version:
+            return matrix
+
+        if engine is None:
+            df = DataProcessor(raw_data_path=str(csv_path)).df
+            if df is None:
+                return None
+            engine = StatisticalEngine(df)
+        cls.build(engine, version, code).save(directory, name)
+        return cls.load(directory, name)
+
+    def query(self, home_team, away_team):
+        """Previsão de um confronto direto da matriz (None se algum time não estiver nela)."""
+        i = self.team_ids.get(home_team)
+        j = self.team_ids.get(away_team)
+        if i is None or j is None:
+            return None
+        return dict(zip(MATRIX_FIELDS, self.values[:, i, j].tolist()))
+
+    def field(self, name):
+        """Matriz N×N de um campo (ex: 'prob_casa'), como visão do arquivo mapeado."""
+        return self.values[MATRIX_FIELDS.index(name)]
+
+def build_league_matrices(leagues=None, seasons=None, loader=None, directory=PROCESSED_DIR, workers=8):
+    """
+    Matrizes de várias ligas de DataLoader.LEAGUES em paralelo (threads): cada tarefa baixa o CSV
+    (cache condicional do DataLoader) e só processa/reconstrói a liga se a versão dos dados mudou.
+    :return: {código_temporada: LeagueMatrix}
+    """
+    from src.data_loader import DataLoader
+
+    loader = loader or DataLoader()
+    leagues = list(leagues or loader.LEAGUES)
+    seasons = list(seasons or [loader.SEASON])
+    jobs = [(loader.LEAGUES[league], season) for league in leagues for season in seasons]
+
+    def one(code, season):
+        path = loader.fetch(code, season)
+        if path is None:
+            return None
+        return LeagueMatrix.load_or_build(path, directory, code=f"{code}_{season}")
+
+    matrices = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        futures = {pool.submit(one, code, season): f"{code}_{season}" for code, season in jobs}
+        for future in as_completed(futures):
+            try:
+                matrix = future.result()
+            except Exception as e:
+                print(f"❌ Matriz {futures[future]}: {e}")
+                continue
+            if matrix is not None:
+                matrices[futures[future]] = matrix
+    return {code: matrices[code] for code in futures.values() if code in matrices}
+
+# --- Bloco de Teste (construção, reuso pela versão e consulta em microssegundos) ---
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+    from src.analyzer import StatisticalEngine
+
+    with tempfile.TemporaryDirectory() as root:
+        csv_path = Path(root) / "E0.csv"
+        shutil.copyfile("data/premier_league_2526.csv", csv_path)
+
+        for step in ("1ª vez (constrói)", "2ª vez (reusa)"):
+            start = time.perf_counter()
+            matrix = LeagueMatrix.load_or_build(csv_path, root, code="E0")
+            print(f"🧮 {step}: {(time.perf_counter() - start) * 1000:.1f} ms ({len(matrix.teams)} times)")
+
+        # Consulta: matriz mapeada vs. predict_match
+        engine = StatisticalEngine(DataProcessor(str(csv_path)).df)
+        homes, aways = engine.all_pairings()
+        start = time.perf_counter()
+        for h, a in zip(homes, aways):
+            matrix.query(h, a)
+        query_us = (time.perf_counter() - start) / len(homes) * 1e6
+        start = time.perf_counter()
+        for h, a in zip(homes, aways):
+            engine.predict_match(h, a)
+        predict_us = (time.perf_counter() - start) / len(homes) * 1e6
+        print(f"⚡ Consulta na matriz: {query_us:.1f} µs | predict_match: {predict_us:.0f} µs")
+
+        reference = engine.predict_match(homes[0], aways[0])
+        print(f"🔎 {homes[0]} vs {aways[0]}: {matrix.query(homes[0], aways[0])} "
+              f"(predict_match: casa {reference['prob_home']}%)")
+
+        # Dados novos mudam a versão: só então a matriz é refeita
+        os.utime(csv_path, ns=(time.time_ns(), time.time_ns()))
+        start = time.perf_counter()
+        rebuilt = LeagueMatrix.load_or_build(csv_path, root, code="E0")
+        print(f"🔁 Versão {matrix.version} -> {rebuilt.version} ({(time.perf_counter() - start) * 1000:.1f} ms)")
@@ -0,0 +1,211 @@
+import numpy as np
+
+# Linhas padrão avaliadas no livro de mercados
+TOTAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+HANDICAP_LINES = (-2.5, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 2.5)
+
+# Linhas de over/under de escanteios e cartões (total do jogo)
+CORNER_LINES = (7.5, 8.5, 9.5, 10.5, 11.5, 12.5)
+CARD_LINES = (2.5, 3.5, 4.5, 5.5, 6.5)
+
+# Mercados com odds guardadas (ODDS_MAP): (rótulo, chave no livro, sufixo da coluna de odd)
+ODDS_SELECTIONS = {
+    '1X2': [('Casa', 'home', 'casa'), ('Empate', 'draw', 'empate'), ('Fora', 'away', 'fora')],
+    'Gols 2.5': [('Over 2.5', 'over_2.5', 'over25'), ('Under 2.5', 'under_2.5', 'under25')],
+}
+
+def remove_overround(odds, method='proportional'):
+    """
+    Probabilidades justas do mercado a partir das odds (..., k) de um mercado completo.
+    - 'proportional': divide 1/odd pela soma (margem repartida proporcionalmente)
+    - 'power': p_i = (1/odd_i)^k com k tal que a soma dê 1 (corrige o viés favorito-zebra)
+    """
+    implied = 1 / np.asarray(odds, dtype=float)
+    if method == 'proportional':
+        return implied / implied.sum(axis=-1, keepdims=True)
+    if method == 'power':
+        # Newton em k, todos os jogos ao mesmo tempo
+        log_implied = np.log(implied)
+        k = np.ones(implied.shape[:-1] + (1,))
+        for _ in range(20):
+            powered = implied ** k
+            k = k - (powered.sum(axis=-1, keepdims=True) - 1) / (powered * log_implied).sum(axis=-1, keepdims=True)
+        return implied ** k
+    raise ValueError(f"Método de remoção de margem desconhecido: {method}")
+
+def poisson_pmf(lam, size):
+    """
+    pmf de Poisson (n, size) para k = 0..size-1 (NumPy puro, sem scipy.stats).
+    Em escala log (k·log λ − λ − log k!): λ grandes dão 0 como o scipy, não inf·0 = NaN.
+    """
+    lam = np.asarray(lam, dtype=float)[:, None]
+    k = np.arange(size)
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, size)))])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k_log_lam = np.where(k == 0, 0.0, k * np.log(lam))  # λ = 0: pmf [1, 0, 0, ...]
+    return np.exp(k_log_lam - lam - log_factorial)
+
+def count_distribution(mean, alpha, max_count):
+    """
+    pmf (n, max_count + 1) de contagens ~ Binomial Negativa com var = média + alpha·média²
+    (alpha = 0 é Poisson), pela recorrência p(k+1) = p(k)·(k + r)·q / (k + 1).
+    """
+    mean = np.asarray(mean, dtype=float)[:, None]
+    alpha = np.asarray(alpha, dtype=float)[:, None]
+    k = np.arange(max_count)
+    poisson_like = ~(alpha > 0)
+    safe = np.where(poisson_like, 1.0, alpha)
+    r = 1 / safe
+    q = safe * mean / (1 + safe * mean)
+    p0 = np.where(poisson_like, np.exp(-mean), (1 + safe * mean) ** -r)
+    ratio = np.where(poisson_like, mean / (k + 1), (k + r) * q / (k + 1))
+    return np.concatenate([p0, p0 * np.cumprod(ratio, axis=1)], axis=1)
+
+def count_ladder(mean, alpha, lines):
+    """Over/under de todas as linhas (x.5) para todos os jogos de uma vez: {'over_9.5': array, ...}."""
+    floors = np.floor(lines).astype(int)
+    cdf = np.cumsum(count_distribution(mean, alpha, floors.max()), axis=1)[:, floors]
+    book = {}
+    for j, line in enumerate(lines):
+        book[f'over_{line:g}'] = 1 - cdf[:, j]
+        book[f'under_{line:g}'] = cdf[:, j]
+    return book
+
+def kelly_stake(prob, odds, fraction=1.0):
+    """Fração da banca pelo critério de Kelly (0 quando não há valor), escalada por `fraction`."""
+    prob = np.asarray(prob, dtype=float)
+    odds = np.asarray(odds, dtype=float)
+    return np.clip((prob * odds - 1) / (odds - 1), 0, None) * fraction
+
+def _split_line(line):
+    """Linhas de quarto (ex: -0.75) viram as duas vizinhas (-1.0, -0.5); as demais ficam iguais."""
+    line = np.asarray(line, dtype=float)
+    quarter = np.abs(line * 4) % 2 == 1
+    return np.where(quarter, line - 0.25, line), np.where(quarter, line + 0.25, line)
+
+# Resultados possíveis de uma aposta no Handicap Asiático (do melhor para o pior)
+AH_OUTCOMES = ('win', 'half_win', 'push', 'half_loss', 'loss')
+
+def asian_handicap_profit(goal_diff, line, odds):
+    """
+    Lucro por unidade apostada no mandante com handicap `line` (convenção AHh do Football-Data)
+    para um saldo de gols (casa - fora). Linhas de quarto (ex: -0.75) dividem a aposta entre
+    as duas linhas vizinhas (-0.5 e -1.0). Para o visitante: asian_handicap_profit(-saldo, -linha, odd).
+    """
+    goal_diff = np.asarray(goal_diff, dtype=float)
+    odds = np.asarray(odds, dtype=float)
+    low, high = _split_line(line)
+
+    def half(part_line):
+        adjusted = goal_diff + part_line
+        return np.where(adjusted > 0, odds - 1, np.where(adjusted < 0, -1.0, 0.0))
+
+    return (half(low) + half(high)) / 2
+
+class MarketEvaluator:
+    """
+    Deriva todos os mercados a partir da matriz de placar (P[casa=h, fora=a]).
+    Cada mercado é uma máscara (G, G); todas ficam empilhadas num tensor (K, G, G)
+    e o livro inteiro sai de um único tensordot, seja para 1 jogo (G, G)
+    ou para um lote (n_jogos, G, G).
+    """
+
+    def __init__(self, total_lines=TOTAL_LINES, handicap_lines=HANDICAP_LINES):
+        self.total_lines = tuple(total_lines)
+        self.handicap_lines = tuple(handicap_lines)
+        self._masks = {}  # cache por tamanho de grade G
+
+    def _build_masks(self, max_goals):
+        """Monta (uma vez por G) os nomes dos mercados e o tensor de máscaras."""
+        goals = np.arange(max_goals)
+        home, away = goals[:, None], goals[None, :]
+        diff = home - away
+        total = home + away
+
+        masks = {
+            # Match Odds e Dupla Chance
+            'home': diff > 0, 'draw': diff == 0, 'away': diff < 0,
+            '1X': diff >= 0, 'X2': diff <= 0, '12': diff != 0,
+            # Ambas Marcam e Clean Sheets
+            'btts_yes': (home >= 1) & (away >= 1),
+            'btts_no': (home == 0) | (away == 0),
+            'clean_sheet_home': np.broadcast_to(away == 0, diff.shape),
+            'clean_sheet_away': np.broadcast_to(home == 0, diff.shape),
+        }
+
+        # Gols (Over/Under) para todas as linhas
+        for line in self.total_lines:
+            masks[f'over_{line:g}'] = total > line
+            masks[f'under_{line:g}'] = total < line
+
+        # Handicap Asiático (linha aplicada ao mandante); linhas inteiras têm devolução (push)
+        for line in self.handicap_lines:
+            adjusted = diff + line
+            masks[f'ah_home_{line:+g}'] = adjusted > 0
+            masks[f'ah_away_{line:+g}'] = adjusted < 0
+            if float(line).is_integer():
+                masks[f'ah_push_{line:+g}'] = adjusted == 0
+
+        names = list(masks)
+        stacked = np.stack([masks[name] for name in names]).astype(float)
+        return names, stacked
+
+    def evaluate(self, score_matrix):
+        """
+        Livro completo de mercados numa única passada vetorizada.
+        Aceita (G, G) -> valores escalares, ou (n_jogos, G, G) -> arrays por jogo.
+        O placar exato fica em 'correct_score' (a própria matriz).
+        """
+        matrices = np.asarray(score_matrix, dtype=float)
+        max_goals = matrices.shape[-1]
+        if max_goals not in self._masks:
+            self._masks[max_goals] = self._build_masks(max_goals)
+        names, stacked = self._masks[max_goals]
+
+        probs = np.tensordot(matrices, stacked, axes=([-2, -1], [1, 2]))
+        book = {name: probs[..., k] for k, name in enumerate(names)}
+        book['correct_score'] = matrices
+        return book
+
+    @staticmethod
+    def goal_difference(score_matrix):
+        """Distribuição do saldo (casa - fora): valores (2G-1,) e probabilidades (..., 2G-1)."""
+        matrices = np.asarray(score_matrix, dtype=float)
+        size = matrices.shape[-1]
+        goals = np.arange(size)
+        diff = (goals[:, None] - goals[None, :]).ravel() + size - 1
+        one_hot = np.zeros((size * size, 2 * size - 1))
+        one_hot[np.arange(size * size), diff] = 1
+        flat = matrices.reshape(matrices.shape[:-2] + (size * size,))
+        return np.arange(-(size - 1), size), flat @ one_hot
+
+    def asian_handicap_ev(self, score_matrix, lines, odds_home, odds_away):
+        """
+        Retorno esperado por unidade no Handicap Asiático (mandante, visitante), vetorizado
+        por jogo: cada jogo com sua linha e suas odds, inclusive linhas de quarto.
+        """
+        values, probs = self.goal_difference(score_matrix)
+        lines = np.asarray(lines, dtype=float)[..., None]
+        ev_home = np.sum(probs * asian_handicap_profit(values, lines, np.asarray(odds_home, dtype=float)[..., None]), axis=-1)
+        ev_away = np.sum(probs * asian_handicap_profit(-values, -lines, np.asarray(odds_away, dtype=float)[..., None]), axis=-1)
+        return ev_home, ev_away
+
+    def asian_handicap_outcomes(self, score_matrix, lines):
+        """
+        Probabilidades de AH_OUTCOMES (vitória, meia-vitória, devolução, meia-derrota, derrota)
+        do mandante na linha de cada jogo, pela mesma distribuição do saldo de asian_handicap_ev.
+        Para o visitante a ordem se inverte (vitória do visitante = derrota do mandante).
+        """
+        values, probs = self.goal_difference(score_matrix)
+        low, high = _split_line(np.asarray(lines, dtype=float)[..., None])
+        # Soma dos sinais das duas metades: 2 = vitória, 1 = meia-vitória, 0 = devolução, ...
+        score = np.sign(values + low) + np.sign(values + high)
+        return {name: np.sum(probs * (score == k), axis=-1) for name, k in zip(AH_OUTCOMES, (2, 1, 0, -1, -2))}
+
+    @staticmethod
+    def correct_scores(score_matrix, top=5):
+        """Placares exatos mais prováveis de um jogo: lista de ('h-a', prob)."""
+        matrix = np.asarray(score_matrix, dtype=float)
+        order = np.argsort(matrix, axis=None)[::-1][:top]
+        home, away = np.unravel_index(order, matrix.shape)
+        return [(f"{h}-{a}", matrix[h, a]) for h, a in zip(home, away)]
@@ -0,0 +1,111 @@
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.data_loader import DataLoader
+from src.processor import DataProcessor
+from src.analyzer import StatisticalEngine
+
+def _refresh_one(loader, league_name, season, build_engine):
+    """Baixa (via cache) e processa uma liga/temporada, medindo cada etapa."""
+    code = loader.LEAGUES[league_name]
+    result = {
+        'liga': league_name, 'codigo': code, 'temporada': season,
+        'ok': False, 'jogos': 0, 'download_s': 0.0, 'processamento_s': 0.0,
+        'erro': None, 'processor': None, 'engine': None
+    }
+
+    start = time.perf_counter()
+    path = loader.fetch(code, season)
+    result['download_s'] = time.perf_counter() - start
+    if path is None:
+        result['erro'] = "Falha no download"
+        return result
+
+    start = time.perf_counter()
+    processor = DataProcessor(raw_data_path=str(path))
+    if processor.df is None:
+        result['erro'] = "Falha ao processar CSV"
+        return result
+    result['processor'] = processor
+    result['jogos'] = len(processor.df)
+    if build_engine:
+        result['engine'] = StatisticalEngine(processor.df)
+    result['processamento_s'] = time.perf_counter() - start
+    result['ok'] = True
+    return result
+
+def refresh_leagues(leagues=None, seasons=None, loader=None, workers=8, build_engines=True):
+    """
+    Atualiza várias ligas (e temporadas) em paralelo num pool de threads.
+    Download e processamento de cada liga rodam na mesma tarefa, então o catálogo
+    inteiro leva aproximadamente o tempo da liga mais lenta.
+    :param leagues: Nomes de DataLoader.LEAGUES (None = todas)
+    :param seasons: Temporadas no formato do Football-Data (ex: ['2526', '2425']); None = atual
+    :return: Lista de resultados por liga/temporada, na ordem do catálogo
+    """
+    loader = loader or DataLoader()
+    leagues = list(leagues or loader.LEAGUES)
+    seasons = list(seasons or [loader.SEASON])
+    jobs = [(league, season) for league in leagues for season in seasons]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        futures = {pool.submit(_refresh_one, loader, league, season, build_engines): (league, season)
+                   for league, season in jobs}
+        for future in as_completed(futures):
+            league, season = futures[future]
+            try:
+                results[(league, season)] = future.result()
+            except Exception as e:
+                results[(league, season)] = {
+                    'liga': league, 'codigo': loader.LEAGUES[league], 'temporada': season,
+                    'ok': False, 'jogos': 0, 'download_s': 0.0, 'processamento_s': 0.0,
+                    'erro': str(e), 'processor': None, 'engine': None
+                }
+    return [results[job] for job in jobs]
+
+def prediction_frame(engine, home_teams, away_teams, full_book=False):
+    """
+    Precifica todos os confrontos de uma vez (predict_matches + predict_counts) numa tabela plana,
+    pronta para exportar. Confrontos sem dados ficam com valido=False e probabilidades NaN.
+    :param full_book: Inclui todas as linhas do livro (totais, handicaps, cantos, cartões)
+    """
+    prediction = engine.predict_matches(home_teams, away_teams)
+    counts = engine.predict_counts(home_teams, away_teams)
+    columns = {
+        'mandante': prediction['home_team'].astype(str),
+        'visitante': prediction['away_team'].astype(str),
+        'valido': prediction['valid'],
+        'xg_casa': prediction['lambda_home'],
+        'xg_fora': prediction['lambda_away'],
+        'prob_casa': prediction['prob_home'],
+        'prob_empate': prediction['prob_draw'],
+        'prob_fora': prediction['prob_away'],
+        'prob_over_25': prediction['prob_over_25'],
+        'prob_btts': prediction['prob_btts'],
+    }
+    with np.errstate(divide='ignore'):
+        for outcome in ('casa', 'empate', 'fora'):
+            columns[f'odd_justa_{outcome}'] = 1 / columns[f'prob_{outcome}']
+    columns['cantos_esperados'] = counts['exp_corners_total']
+    columns['cartoes_esperados'] = counts['exp_cards_total']
+
+    if full_book:
+        columns.update({f'mercado_{k}': v for k, v in prediction['markets'].items() if k != 'correct_score'})
+        columns.update({f'cantos_{k}': v for k, v in counts['corners_markets'].items()})
+        columns.update({f'cartoes_{k}': v for k, v in counts['cards_markets'].items()})
+    return pd.DataFrame(columns)
+
+# --- Bloco de Teste ---
+if __name__ == "__main__":
+    start = time.perf_counter()
+    resultados = refresh_leagues()
+    total = time.perf_counter() - start
+
+    for r in resultados:
+        status = "✅" if r['ok'] else f"❌ {r['erro']}"
+        print(f"{r['liga']:<30} {r['temporada']} {r['jogos']:>4} jogos | "
+              f"download {r['download_s']:.2f}s | processamento {r['processamento_s']:.2f}s | {status}")
+    print(f"\n⏱️ Total: {total:.2f}s (soma sequencial: "
+          f"{sum(r['download_s'] + r['processamento_s'] for r in resultados):.2f}s)")
@@ -1,9 +1,14 @@
 import numpy as np
+import pandas as pd
+from src.markets import ODDS_SELECTIONS, MarketEvaluator, kelly_stake, remove_overround
+from src.profiling import timed
 
 class BetAdvisor:
     def __init__(self, statistical_engine):
         self.engine = statistical_engine
+        self.markets = MarketEvaluator()
 
+    @timed('advisor.get_match_suggestion')
     def get_match_suggestion(self, home_team, away_team):
         """
         Analisa probabilidades e gera dicas com ODD JUSTA.
@@ -38,13 +43,9 @@ class BetAdvisor:
             })
 
         # --- Lógica 2: Gols (Over 2.5) ---
-        matrix = prediction['score_matrix']
-        prob_over_25 = 0
-        for h in range(6):
-            for a in range(6):
-                if (h + a) > 2.5: prob_over_25 += matrix[h, a]
-        
-        prob_over_25 = round(prob_over_25 * 100, 1)
+        # Livro completo de mercados (totais, handicaps, dupla chance...) numa passada só
+        book = self.markets.evaluate(prediction['score_matrix'])
+        prob_over_25 = round(book['over_2.5'] * 100, 1)
         
         if prob_over_25 >= 60:
             tips.append({
@@ -56,11 +57,7 @@ class BetAdvisor:
             })
 
         # --- Lógica 3: Ambas Marcam (BTTS) ---
-        prob_btts = 0
-        for h in range(1, 6):
-            for a in range(1, 6):
-                prob_btts += matrix[h, a]
-        prob_btts = round(prob_btts * 100, 1)
+        prob_btts = round(book['btts_yes'] * 100, 1)
 
         if prob_btts >= 60:
             tips.append({
@@ -71,41 +68,120 @@ class BetAdvisor:
                 "confianca": "Média"
             })
 
-        # --- Lógica 4: Escanteios ---
+        # --- Lógica 4 e 5: Escanteios e Cartões ---
+        # Maior linha com over >= 60% na escada de contagens (Binomial Negativa)
         sec = prediction['secondary_metrics']
-        exp_corners = sec['exp_corners_total']
-        
-        if exp_corners >= 10.5:
-             tips.append({
-                "mercado": "Escanteios",
-                "selecao": "Over 9.5 Cantos",
-                "probabilidade": f"Média esperada: {exp_corners}",
-                "odd_justa": "-", # Não aplicável
-                "confianca": "Média"
-            })
-
-        # --- Lógica 5: Cartões ---
-        exp_cards = sec['exp_cards_total']
-        
-        if exp_cards >= 4.5:
-             tips.append({
-                "mercado": "Cartões",
-                "selecao": "Over 3.5 Cartões",
-                "probabilidade": f"Média esperada: {exp_cards}",
-                "odd_justa": "-", # Não aplicável
-                "confianca": "Baixa"
-            })
+        for mercado, ladder, unidade in (("Escanteios", 'corners_markets', "Cantos"),
+                                         ("Cartões", 'cards_markets', "Cartões")):
+            overs = [(float(key[5:]), prob) for key, prob in sec[ladder].items()
+                     if key.startswith('over_') and prob >= 0.60]
+            if overs:
+                line, prob = max(overs)
+                prob = round(prob * 100, 1)
+                tips.append({
+                    "mercado": mercado,
+                    "selecao": f"Over {line:g} {unidade}",
+                    "probabilidade": f"{prob}%",
+                    "odd_justa": round(100 / prob, 2), # CÁLCULO DA ODD
+                    "confianca": "Alta" if prob > 70 else "Média"
+                })
 
         return {
             "match": f"{home_team} vs {away_team}",
             "stats": prediction,
+            "mercados": book,
             "sugestoes": tips
         }
 
+    @timed('advisor.rank_value_bets')
+    def rank_value_bets(self, fixtures, price_source='media', overround='proportional',
+                        kelly_fraction=0.25, min_edge=0.0, bankroll=100.0):
+        """
+        Apostas de valor de uma rodada (ou liga inteira) numa passada vetorizada:
+        probabilidades do modelo (predict_matches) contra as odds guardadas
+        (DataProcessor(..., odds=True)) em 1X2, Gols 2.5 e Handicap Asiático.
+        A seleção (min_edge) e o stake usam o valor esperado na odd oferecida, que é o preço
+        realmente pago; prob_mercado (odd sem a margem da casa) e vantagem (probabilidade −
+        prob_mercado) são informativas, para comparar o modelo com o consenso do mercado.
+        No Handicap Asiático, probabilidade é a chance de ganhar entre os resultados que não
+        devolvem a aposta (meia-vitória/meia-derrota valem meio), então odd_justa é a odd de
+        equilíbrio (valor esperado zero) da linha.
+        :param fixtures: DataFrame com mandante, visitante e colunas odd_{fonte}_* / ah_linha
+        :param price_source: Bookmaker das odds: 'media', 'pinnacle' ou 'b365'
+        :param overround: Remoção da margem da casa: 'proportional' ou 'power'
+        :param kelly_fraction: Fração de Kelly (0.25 = um quarto de Kelly)
+        :param min_edge: Valor esperado mínimo por unidade (ex: 0.05 = 5%)
+        :param bankroll: Banca usada para converter a fração de Kelly em stake
+        :return: DataFrame ordenado por valor esperado (maior primeiro)
+        """
+        homes = fixtures['mandante'].astype(str).to_numpy()
+        aways = fixtures['visitante'].astype(str).to_numpy()
+        games = np.char.add(np.char.add(homes.astype(str), ' vs '), aways.astype(str))
+        prediction = self.engine.predict_matches(homes, aways)
+        book, valid = prediction['markets'], prediction['valid']
+
+        def odds_column(column):
+            name = f"odd_{price_source}_{column}"
+            return fixtures[name].to_numpy(dtype=float) if name in fixtures else np.full(len(fixtures), np.nan)
+
+        frames = []
+        for market, selections in ODDS_SELECTIONS.items():
+            odds = np.column_stack([odds_column(col) for _, _, col in selections])
+            prob = np.column_stack([book[key] for _, key, _ in selections])
+            labels = np.array([label for label, _, _ in selections])
+            frames.append(self._value_frame(games, market, np.broadcast_to(labels, odds.shape), prob,
+                                            remove_overround(odds, overround), odds,
+                                            prob * odds - 1, kelly_stake(prob, odds, kelly_fraction), valid))
+
+        # Handicap Asiático: EV exato com meia-vitória/devolução; probabilidade sem as devoluções
+        lines = fixtures['ah_linha'].to_numpy(dtype=float) if 'ah_linha' in fixtures else np.full(len(fixtures), np.nan)
+        odds = np.column_stack([odds_column('ah_casa'), odds_column('ah_fora')])
+        has_line = valid & np.isfinite(lines)
+        ev = np.full(odds.shape, np.nan)
+        prob = np.full(odds.shape, np.nan)
+        if has_line.any():
+            matrices = prediction['score_matrix'][has_line]
+            ev[has_line] = np.column_stack(self.markets.asian_handicap_ev(
+                matrices, lines[has_line], odds[has_line, 0], odds[has_line, 1]))
+            outcomes = self.markets.asian_handicap_outcomes(matrices, lines[has_line])
+            won = outcomes['win'] + outcomes['half_win'] / 2  # do mandante
+            lost = outcomes['loss'] + outcomes['half_loss'] / 2
+            with np.errstate(invalid='ignore'):
+                prob[has_line] = np.column_stack([won, lost]) / (won + lost)[:, None]
+        labels = np.column_stack([np.char.add('Casa ', np.char.mod('%+g', lines)),
+                                  np.char.add('Fora ', np.char.mod('%+g', -lines))])
+        frames.append(self._value_frame(games, 'Handicap Asiático', labels, prob,
+                                        remove_overround(odds, overround), odds, ev,
+                                        kelly_stake(prob, odds, kelly_fraction), has_line))
+
+        value = pd.concat(frames, ignore_index=True)
+        value = value[np.isfinite(value['valor_esperado']) & (value['valor_esperado'] > min_edge)]
+        value['stake'] = value['kelly'] * bankroll
+        return value.sort_values('valor_esperado', ascending=False, kind='stable').reset_index(drop=True)
+
+    @staticmethod
+    def _value_frame(games, market, labels, prob, prob_market, odds, ev, kelly, valid):
+        """Achata as matrizes (n_jogos, n_seleções) de um mercado em linhas da lista de valor."""
+        keep = np.broadcast_to(valid[:, None], odds.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fair = 1 / prob
+        return pd.DataFrame({
+            'jogo': np.repeat(games, odds.shape[1])[keep.ravel()],
+            'mercado': market,
+            'selecao': labels[keep],
+            'probabilidade': prob[keep],
+            'prob_mercado': prob_market[keep],
+            'vantagem': (prob - prob_market)[keep],
+            'odd_justa': fair[keep],
+            'odd': odds[keep],
+            'valor_esperado': ev[keep],
+            'kelly': kelly[keep],
+        })
+
 # --- Bloco de Teste ---
 if __name__ == "__main__":
-    from processor import DataProcessor
-    from analyzer import StatisticalEngine
+    from src.processor import DataProcessor
+    from src.analyzer import StatisticalEngine
     
     proc = DataProcessor()
     df = proc.df
@@ -117,4 +193,13 @@ if __name__ == "__main__":
     analise = advisor.get_match_suggestion("Chelsea", "Tottenham")
     
     for tip in analise['sugestoes']:
-        print(f"💰 {tip['mercado']}: {tip['selecao']} (Odd Justa: {tip['odd_justa']})")
\ No newline at end of file
+        print(f"💰 {tip['mercado']}: {tip['selecao']} (Odd Justa: {tip['odd_justa']})")
+
+    # Lista de valor da última rodada com odds, usando só os jogos anteriores a ela
+    odds_df = DataProcessor("data/premier_league_2324.csv", odds=True).df
+    last_dates = odds_df['data'] >= odds_df['data'].sort_values().iloc[-10]
+    history = odds_df.loc[~last_dates, [c for c in odds_df.columns if not c.startswith(('odd_', 'ah_'))]]
+    value_advisor = BetAdvisor(StatisticalEngine(history))
+    valor = value_advisor.rank_value_bets(odds_df[last_dates], min_edge=0.02)
+    print(f"\n📈 {len(valor)} apostas de valor na última rodada (1/4 de Kelly, banca 100):")
+    print(valor.head(10).round(3).to_string(index=False))
\ No newline at end of file
@@ -1,90 +1,442 @@
+import json
+import os
+import tempfile
+import time
 import pandas as pd
 import numpy as np
+from pathlib import Path
+from src.profiling import timed
+
+# Colunas do Football-Data que usamos (Original: Nome interno)
+COL_MAP = {
+    'Date': 'data', 'HomeTeam': 'mandante', 'AwayTeam': 'visitante',
+    'FTHG': 'gols_mandante', 'FTAG': 'gols_visitante',
+    'FTR': 'resultado',
+    'HST': 'chutes_alvo_mandante', 'AST': 'chutes_alvo_visitante',
+    'HC': 'cantos_mandante', 'AC': 'cantos_visitante',
+    'HY': 'amarelos_mandante', 'AY': 'amarelos_visitante',
+    'HR': 'vermelhos_mandante', 'AR': 'vermelhos_visitante'
+}
+
+# Odds dos bookmakers (Bet365, Pinnacle e média do mercado), abertura e fechamento.
+# Só são carregadas com DataProcessor(..., odds=True)
+ODDS_MAP = {
+    # Match Odds (1X2)
+    'B365H': 'odd_b365_casa', 'B365D': 'odd_b365_empate', 'B365A': 'odd_b365_fora',
+    'PSH': 'odd_pinnacle_casa', 'PSD': 'odd_pinnacle_empate', 'PSA': 'odd_pinnacle_fora',
+    'AvgH': 'odd_media_casa', 'AvgD': 'odd_media_empate', 'AvgA': 'odd_media_fora',
+    # Gols (Over/Under 2.5)
+    'B365>2.5': 'odd_b365_over25', 'B365<2.5': 'odd_b365_under25',
+    'P>2.5': 'odd_pinnacle_over25', 'P<2.5': 'odd_pinnacle_under25',
+    'Avg>2.5': 'odd_media_over25', 'Avg<2.5': 'odd_media_under25',
+    # Handicap Asiático (linha do mandante)
+    'AHh': 'ah_linha',
+    'B365AHH': 'odd_b365_ah_casa', 'B365AHA': 'odd_b365_ah_fora',
+    'PAHH': 'odd_pinnacle_ah_casa', 'PAHA': 'odd_pinnacle_ah_fora',
+    'AvgAHH': 'odd_media_ah_casa', 'AvgAHA': 'odd_media_ah_fora',
+    # Fechamento (closing line)
+    'PSCH': 'odd_pinnacle_casa_fech', 'PSCD': 'odd_pinnacle_empate_fech', 'PSCA': 'odd_pinnacle_fora_fech',
+    'AvgCH': 'odd_media_casa_fech', 'AvgCD': 'odd_media_empate_fech', 'AvgCA': 'odd_media_fora_fech',
+    'PC>2.5': 'odd_pinnacle_over25_fech', 'PC<2.5': 'odd_pinnacle_under25_fech',
+    'AvgC>2.5': 'odd_media_over25_fech', 'AvgC<2.5': 'odd_media_under25_fech',
+    'AHCh': 'ah_linha_fech',
+    'PCAHH': 'odd_pinnacle_ah_casa_fech', 'PCAHA': 'odd_pinnacle_ah_fora_fech',
+    'AvgCAHH': 'odd_media_ah_casa_fech', 'AvgCAHA': 'odd_media_ah_fora_fech',
+}
+
+# Estatísticas da tabela longa time-jogo (uma linha por time por partida)
+FORM_STATS = ['gols_pro', 'gols_contra', 'chutes_no_alvo', 'cantos', 'cartoes']
+
+# Armazenamento colunar (Parquet) dos dados já limpos; exige pyarrow (opcional)
+PROCESSED_DIR = "data/processed"
+STORE_VERSION = 3  # muda quando o conjunto de colunas gravadas muda (força reconstrução)
+
+def _columnar_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _replace_atomically(path, write):
+    """
+    Grava via write(caminho_temporário) num arquivo de nome único na mesma pasta e troca pelo
+    destino com os.replace: leitores (e gravações concorrentes) nunca veem um arquivo pela metade.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+def data_version(path):
+    """Versão dos dados de um CSV (data de modificação + tamanho): muda quando o arquivo muda."""
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+def team_dtype(*columns):
+    """Categoria única (ordenada por nome) para as colunas de times: o código é o id do time."""
+    names = set()
+    for values in columns:
+        names.update(pd.unique(pd.Series(values).dropna().astype(str)))
+    return pd.CategoricalDtype(sorted(names))
+
+def encode_teams(values, teams):
+    """
+    Nomes -> ids (posição em `teams`, -1 para desconhecidos) sem comparar strings jogo a jogo:
+    colunas categóricas traduzem só as categorias e reaproveitam os códigos inteiros.
+    """
+    index = teams if isinstance(teams, pd.Index) else pd.Index(teams)
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        categorical = values.array if isinstance(values, pd.Series) else values
+        lookup = np.append(index.get_indexer(categorical.categories), -1)
+        return lookup[categorical.codes]
+    return index.get_indexer(np.asarray(values, dtype=object))
+
+def compact_frame(df):
+    """Tipos compactos: contagens int8/int16, times/resultado categóricos, data datetime64."""
+    df = df.copy()
+    teams = [c for c in ('mandante', 'visitante') if c in df]
+    if teams:
+        dtype = team_dtype(*(df[c] for c in teams))
+        for col in teams:
+            df[col] = df[col].astype(str).astype(dtype)
+    if 'resultado' in df:
+        df['resultado'] = df['resultado'].astype('category')
+    for col in df.columns:
+        if col in ('data', 'mandante', 'visitante', 'resultado'):
+            continue
+        # Colunas com jogos sem dado (NaN) e odds ficam float32
+        if df[col].isna().any() or pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype('float32')
+        else:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
 
 class DataProcessor:
     # ATUALIZADO: Aponta para o novo arquivo csv
-    def __init__(self, raw_data_path="data/premier_league_2526.csv"):
+    def __init__(self, raw_data_path="data/premier_league_2526.csv", columns=None, processed_dir=PROCESSED_DIR,
+                 odds=False):
+        """
+        :param columns: Colunas internas a carregar (ex: ['mandante', 'gols_mandante']); None = todas
+        :param processed_dir: Pasta do armazenamento colunar; None desativa
+        :param odds: Inclui as colunas de ODDS_MAP quando columns=None
+        """
         self.raw_data_path = raw_data_path
+        self.columns = columns
+        self.odds = odds
+        self.processed_dir = Path(processed_dir) if processed_dir else None
         self.df = None
+        self._team_matches = None
+        self._form = {}  # cache da forma recente por número de jogos
+        self._arrays = None
         self.load_and_clean() 
 
+    def _store_paths(self):
+        stem = Path(self.raw_data_path).stem
+        return self.processed_dir / f"{stem}.parquet", self.processed_dir / f"{stem}.json"
+
+    def _source_signature(self):
+        """Identifica a versão do CSV de origem (tamanho + data de modificação)."""
+        stat = Path(self.raw_data_path).stat()
+        return {'source': str(self.raw_data_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'versao': STORE_VERSION}
+
+    def _wanted_columns(self, available):
+        """Colunas pedidas que existem no arquivo (por padrão, as de COL_MAP e, com odds=True, ODDS_MAP)."""
+        if self.columns is not None:
+            wanted = self.columns
+        else:
+            wanted = list(COL_MAP.values()) + (list(ODDS_MAP.values()) if self.odds else [])
+        return [c for c in wanted if c in available]
+
+    def _load_store(self):
+        """
+        Lê do Parquet só as colunas pedidas, se ele estiver em dia com o CSV.
+        Metadados ou Parquet corrompidos contam como armazenamento desatualizado (refeito do CSV).
+        """
+        if self.processed_dir is None or not _columnar_available():
+            return None
+        store_path, meta_path = self._store_paths()
+        if not store_path.exists() or not meta_path.exists():
+            return None
+        signature = self._source_signature()
+        try:
+            meta = json.loads(meta_path.read_text())
+            if not isinstance(meta, dict):
+                raise ValueError("metadados não são um objeto JSON")
+            stored = meta.pop('colunas', [])
+            if meta != signature:
+                return None
+            return pd.read_parquet(store_path, columns=self._wanted_columns(stored))
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Armazenamento {store_path} ilegível ({e}); refazendo a partir do CSV.")
+            return None
+
+    def _write_store(self, df):
+        if self.processed_dir is None or not _columnar_available():
+            return
+        store_path, meta_path = self._store_paths()
+        self.processed_dir.mkdir(parents=True, exist_ok=True)
+        # Parquet antes dos metadados: metadados novos sempre apontam para um Parquet completo
+        _replace_atomically(store_path, lambda tmp: df.to_parquet(tmp, index=False))
+        meta = json.dumps({**self._source_signature(), 'colunas': list(df.columns)})
+        _replace_atomically(meta_path, lambda tmp: Path(tmp).write_text(meta))
+
+    @timed('processor.parse_csv')
+    def _parse_csv(self):
+        """Caminho original: lê o CSV bruto, converte datas e renomeia colunas (inclui as odds)."""
+        col_map = {**COL_MAP, **ODDS_MAP}
+        df = pd.read_csv(self.raw_data_path, usecols=lambda c: c in col_map)
+        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+
+        # Filtra apenas as colunas que nos interessam
+        # O set_axis/rename ignora colunas que não existem no map, evitando erros se o CSV mudar levemente
+        available_cols = [c for c in col_map.keys() if c in df.columns]
+        return df[available_cols].rename(columns=col_map)
+
+    @timed('processor.load_and_clean')
     def load_and_clean(self):
-        """Carrega CSV, converte datas e renomeia colunas."""
+        """Carrega os dados limpos do armazenamento colunar ou, se desatualizado, do CSV."""
         try:
-            self.df = pd.read_csv(self.raw_data_path)
-            self.df['Date'] = pd.to_datetime(self.df['Date'], dayfirst=True)
-            
-            col_map = {
-                'Date': 'data', 'HomeTeam': 'mandante', 'AwayTeam': 'visitante',
-                'FTHG': 'gols_mandante', 'FTAG': 'gols_visitante',
-                'FTR': 'resultado',
-                'HST': 'chutes_alvo_mandante', 'AST': 'chutes_alvo_visitante',
-                'HC': 'cantos_mandante', 'AC': 'cantos_visitante',
-                'HY': 'amarelos_mandante', 'AY': 'amarelos_visitante',
-                'HR': 'vermelhos_mandante', 'AR': 'vermelhos_visitante'
-            }
-            # Filtra apenas as colunas que nos interessam
-            # O set_axis/rename ignora colunas que não existem no map, evitando erros se o CSV mudar levemente
-            available_cols = [c for c in col_map.keys() if c in self.df.columns]
-            self.df = self.df[available_cols].rename(columns=col_map)
-            
+            df = self._load_store()
+            if df is None:
+                df = compact_frame(self._parse_csv())
+                self._write_store(df)
+                df = df[self._wanted_columns(df.columns)]
+            self.df = df
             return self.df
             
         except FileNotFoundError:
             print(f"❌ Erro: Arquivo {self.raw_data_path} não encontrado. Execute o data_loader.py primeiro.")
             return None
     
+    def append_matches(self, new_matches):
+        """
+        Acrescenta jogos novos (já no formato limpo) e invalida os caches derivados
+        (tabela time-jogo e forma). Use junto com StatisticalEngine.update(new_matches).
+        """
+        if new_matches is None or len(new_matches) == 0:
+            return self.df
+        df = pd.concat([self.df, new_matches], ignore_index=True)
+        # Times novos mudam as categorias: recodifica mandante/visitante com a categoria unida
+        dtype = team_dtype(df['mandante'], df['visitante'])
+        for col in ('mandante', 'visitante'):
+            df[col] = df[col].astype(str).astype(dtype)
+        self.df = df
+        self._team_matches = None
+        self._form = {}
+        self._arrays = None
+        return self.df
+
+    def read_new_matches(self):
+        """
+        Relê o arquivo de origem e retorna só os jogos que ainda não estão em self.df
+        (o Football-Data acrescenta as rodadas no fim do CSV).
+        """
+        fresh = DataProcessor(self.raw_data_path, columns=self.columns,
+                              processed_dir=self.processed_dir, odds=self.odds).df
+        if fresh is None or self.df is None:
+            return fresh
+        return fresh.iloc[len(self.df):]
+
     def listar_times(self):
         """Retorna uma lista com todos os times disponíveis no CSV."""
         if self.df is None: return []
         return sorted(self.df['mandante'].unique())
 
-    # ... (Mantenha o resto das funções get_team_stats igual estava antes) ...
-    # Vou replicar a função get_team_stats aqui para garantir que você tenha o arquivo completo
-    
-    def get_team_stats(self, team, games=5, location='all'):
-        if self.df is None: return None
+    @property
+    def teams(self):
+        """Nomes dos times na ordem dos ids (id -> nome)."""
+        if self.df is None: return []
+        return list(self.df['mandante'].cat.categories)
 
-        if location == 'home':
-            matches = self.df[self.df['mandante'] == team].copy()
-        elif location == 'away':
-            matches = self.df[self.df['visitante'] == team].copy()
-        else: 
-            matches = self.df[(self.df['mandante'] == team) | (self.df['visitante'] == team)].copy()
+    @property
+    def team_ids(self):
+        """Mapa nome -> id (o código categórico de mandante/visitante)."""
+        return {team: i for i, team in enumerate(self.teams)}
 
-        matches = matches.sort_values('data').tail(games)
+    def match_arrays(self):
+        """
+        Colunas como arrays NumPy contíguos (montados uma vez): times como ids int16
+        ('mandante'/'visitante'), contagens no tipo compacto e data em datetime64.
+        """
+        if self._arrays is None and self.df is not None:
+            arrays = {}
+            for col in self.df.columns:
+                values = self.df[col]
+                if col in ('mandante', 'visitante'):
+                    arrays[col] = values.cat.codes.to_numpy().astype(np.int16)
+                elif isinstance(values.dtype, pd.CategoricalDtype):
+                    arrays[col] = values.to_numpy()
+                else:
+                    arrays[col] = np.ascontiguousarray(values.to_numpy())
+            self._arrays = arrays
+        return self._arrays
 
-        if matches.empty: return None
+    @property
+    def team_matches(self):
+        """
+        Tabela longa (montada uma vez por liga): uma linha por time por jogo,
+        com colunas pró/contra do ponto de vista do time e o local ('home'/'away').
+        """
+        if self._team_matches is None and self.df is not None:
+            df = self.df
 
-        stats = {
-            'jogos': len(matches), 'gols_pro': 0, 'gols_contra': 0,
-            'chutes_no_alvo': 0, 'cantos': 0, 'cartoes': 0
-        }
+            def col(name):
+                # Ligas sem a coluna contam zero (como o antigo row.get(col, 0))
+                return df[name].to_numpy() if name in df else np.zeros(len(df))
+
+            def side(team, prefix_pro, prefix_contra, local):
+                return pd.DataFrame({
+                    'time': df[team].astype(str).to_numpy(),
+                    'data': df['data'].to_numpy(),
+                    'local': local,
+                    'gols_pro': col(f'gols_{prefix_pro}'),
+                    'gols_contra': col(f'gols_{prefix_contra}'),
+                    'chutes_no_alvo': col(f'chutes_alvo_{prefix_pro}'),
+                    'cantos': col(f'cantos_{prefix_pro}'),
+                    'cartoes': col(f'amarelos_{prefix_pro}') + col(f'vermelhos_{prefix_pro}'),
+                })
+
+            long = pd.concat([side('mandante', 'mandante', 'visitante', 'home'),
+                              side('visitante', 'visitante', 'mandante', 'away')], ignore_index=True)
+            long[FORM_STATS] = long[FORM_STATS].astype(float)
+            self._team_matches = long.sort_values(['time', 'data'], kind='stable').reset_index(drop=True)
+        return self._team_matches
+
+    @timed('processor.form_table')
+    def form_table(self, games=5):
+        """
+        Forma recente (médias dos últimos `games` jogos) de todos os times, em casa,
+        fora e geral ('all'), calculada numa única passada de rolling agrupado.
+        Índice: (time, local). Colunas: 'jogos' + FORM_STATS.
+        """
+        if games not in self._form:
+            tm = self.team_matches
+            # Duplica a tabela com local='all' para que geral/casa/fora saiam do mesmo groupby
+            both = pd.concat([tm.assign(local='all'), tm], ignore_index=True)
+            grouped = both.groupby(['time', 'local'], sort=False)
+
+            rolling = grouped[FORM_STATS].rolling(games, min_periods=1).sum()
+            latest = rolling.groupby(level=[0, 1], sort=False).last()
+            played = grouped.size().clip(upper=games).reindex(latest.index)
+
+            form = latest.div(played, axis=0)
+            form.insert(0, 'jogos', played)
+            self._form[games] = form
+        return self._form[games]
 
-        for _, row in matches.iterrows():
-            if row['mandante'] == team:
-                stats['gols_pro'] += row['gols_mandante']
-                stats['gols_contra'] += row['gols_visitante']
-                stats['chutes_no_alvo'] += row.get('chutes_alvo_mandante', 0)
-                stats['cantos'] += row.get('cantos_mandante', 0)
-                stats['cartoes'] += row.get('amarelos_mandante', 0) + row.get('vermelhos_mandante', 0)
-            else: 
-                stats['gols_pro'] += row['gols_visitante']
-                stats['gols_contra'] += row['gols_mandante']
-                stats['chutes_no_alvo'] += row.get('chutes_alvo_visitante', 0)
-                stats['cantos'] += row.get('cantos_visitante', 0)
-                stats['cartoes'] += row.get('amarelos_visitante', 0) + row.get('vermelhos_visitante', 0)
+    def get_team_stats(self, team, games=5, location='all'):
+        if self.df is None: return None
+
+        # Consulta na forma pré-calculada; média dividida pelos jogos realmente encontrados
+        form = self.form_table(games)
+        key = (team, location if location in ('home', 'away') else 'all')
+        if key not in form.index: return None
+        row = form.loc[key]
 
         return {
             'time': team,
             'filtro': f"Últimos {games} jogos ({location})",
-            'media_gols_feitos': round(stats['gols_pro'] / games, 2),
-            'media_gols_sofridos': round(stats['gols_contra'] / games, 2),
-            'media_chutes_alvo': round(stats['chutes_no_alvo'] / games, 2),
-            'media_cantos': round(stats['cantos'] / games, 2),
-            'media_cartoes': round(stats['cartoes'] / games, 2)
+            'jogos': int(row['jogos']),
+            'media_gols_feitos': round(row['gols_pro'], 2),
+            'media_gols_sofridos': round(row['gols_contra'], 2),
+            'media_chutes_alvo': round(row['chutes_no_alvo'], 2),
+            'media_cantos': round(row['cantos'], 2),
+            'media_cartoes': round(row['cartoes'], 2)
         }
 
+class SeasonHistory:
+    """
+    Várias temporadas de uma liga expostas como uma visão única, montada sob demanda.
+    Cada temporada só tem lidas as colunas que alguma consulta pediu (uma vez cada);
+    a visão concatenada ganha a coluna categórica 'temporada'.
+    """
+
+    def __init__(self, season_paths, processed_dir=PROCESSED_DIR):
+        """
+        :param season_paths: Dicionário {temporada: caminho do CSV}, ex: DataLoader.load_seasons(...)
+        """
+        self.season_paths = dict(sorted(season_paths.items()))
+        self.processed_dir = processed_dir
+        self._columns = {season: {} for season in self.season_paths}  # temporada -> {coluna: Series}
+        self._views = {}
+
+    @property
+    def seasons(self):
+        return list(self.season_paths)
+
+    def _season_columns(self, season, columns):
+        """Colunas de uma temporada, lendo do disco apenas as que ainda não estão em memória."""
+        loaded = self._columns[season]
+        missing = [c for c in columns if c not in loaded]
+        if missing:
+            proc = DataProcessor(self.season_paths[season], columns=missing, processed_dir=self.processed_dir)
+            if proc.df is None:
+                raise FileNotFoundError(self.season_paths[season])
+            for col in missing:
+                # Colunas que a temporada não tem (CSV antigo) ficam vazias
+                loaded[col] = proc.df[col] if col in proc.df else pd.Series(np.nan, index=proc.df.index)
+        return pd.DataFrame({col: loaded[col] for col in columns})
+
+    def view(self, columns=None, seasons=None):
+        """
+        Visão concatenada das temporadas pedidas (None = todas) com só as colunas pedidas.
+        O resultado fica em cache para a mesma combinação de colunas/temporadas.
+        """
+        columns = tuple(columns or COL_MAP.values())
+        seasons = tuple(seasons or self.season_paths)
+        key = (columns, seasons)
+        if key not in self._views:
+            frames = [self._season_columns(season, columns) for season in seasons]
+            df = pd.concat(frames, ignore_index=True)
+            df['temporada'] = pd.Categorical(
+                np.repeat(seasons, [len(f) for f in frames]), categories=list(self.season_paths))
+            # Categorias de times diferem entre temporadas; refaz uma categoria única na visão unida
+            teams = [c for c in ('mandante', 'visitante') if c in df]
+            if teams:
+                dtype = team_dtype(*(df[c] for c in teams))
+                for col in teams:
+                    df[col] = df[col].astype(str).astype(dtype)
+            if 'resultado' in df and df['resultado'].dtype != 'category':
+                df['resultado'] = df['resultado'].astype('category')
+            self._views[key] = df
+        return self._views[key]
+
 if __name__ == "__main__":
     proc = DataProcessor()
-    print(proc.listar_times())
\ No newline at end of file
+    print(proc.listar_times())
+
+    # Benchmark: CSV completo (caminho antigo) vs. Parquet com poda de colunas
+    def csv_original(path):
+        df = pd.read_csv(path)
+        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+        return df[[c for c in COL_MAP if c in df.columns]].rename(columns=COL_MAP)
+
+    def medir(func, repeticoes=20):
+        start = time.perf_counter()
+        for _ in range(repeticoes):
+            func()
+        return (time.perf_counter() - start) / repeticoes * 1000
+
+    engine_cols = ['mandante', 'visitante', 'gols_mandante', 'gols_visitante',
+                   'cantos_mandante', 'cantos_visitante', 'amarelos_mandante',
+                   'amarelos_visitante', 'vermelhos_mandante', 'vermelhos_visitante']
+    path = proc.raw_data_path
+    print(f"\n⏱️ CSV bruto + limpeza:       {medir(lambda: csv_original(path)):.2f} ms")
+    print(f"⏱️ Parquet (todas as colunas): {medir(lambda: DataProcessor(path)):.2f} ms")
+    print(f"⏱️ Parquet (colunas do motor): {medir(lambda: DataProcessor(path, columns=engine_cols)):.2f} ms")
+    print(f"💾 Memória: {csv_original(path).memory_usage(deep=True).sum() / 1024:.0f} KB -> "
+          f"{proc.df.memory_usage(deep=True).sum() / 1024:.0f} KB "
+          f"(arrays: {sum(a.nbytes for a in proc.match_arrays().values()) / 1024:.0f} KB)")
+
+    # Filtro por time: comparação de strings vs. ids inteiros
+    original = csv_original(path)
+    ids = proc.match_arrays()['mandante']
+    team_id = proc.team_ids['Arsenal']
+    print(f"🔎 Filtro por time (strings): {medir(lambda: original['mandante'] == 'Arsenal', 200):.3f} ms")
+    print(f"🔎 Filtro por time (ids):     {medir(lambda: ids == team_id, 200):.3f} ms")
\ No newline at end of file
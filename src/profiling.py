@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+from functools import wraps
+
+# Hooks de tempo (opt-in): callback(etapa, segundos). Sem hooks, cada etapa custa um `if`.
+_hooks = []
+
+def add_hook(callback):
+    """Registra um callback(etapa, segundos) chamado ao fim de cada etapa instrumentada."""
+    _hooks.append(callback)
+    return callback
+
+def remove_hook(callback):
+    if callback in _hooks:
+        _hooks.remove(callback)
+
+def timed(stage):
+    """Decorador que mede a etapa e avisa os hooks registrados."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                for hook in list(_hooks):
+                    hook(stage, elapsed)
+        return wrapper
+    return decorator
+
+class StageTimer:
+    """Hook que acumula chamadas e tempo por etapa (use como `with StageTimer() as t:`)."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def __call__(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def __enter__(self):
+        return add_hook(self)
+
+    def __exit__(self, *exc):
+        remove_hook(self)
+
+    def summary(self):
+        """{etapa: {'chamadas', 'total_s', 'media_ms'}} ordenado pelo tempo total."""
+        report = {stage: {'chamadas': len(s), 'total_s': sum(s), 'media_ms': sum(s) / len(s) * 1000}
+                  for stage, s in self.samples.items()}
+        return dict(sorted(report.items(), key=lambda item: -item[1]['total_s']))
+
+def _print_hook(stage, seconds):
+    print(f"⏱️ {stage}: {seconds * 1000:.2f} ms", file=sys.stderr)
+
+# FUTEBOL_PROFILE=1 imprime o tempo de cada etapa em stderr (qualquer entrada: menu, batch, serve)
+if os.environ.get('FUTEBOL_PROFILE'):
+    add_hook(_print_hook)
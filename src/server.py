@@ -0,0 +1,346 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from src.data_loader import DataLoader
+from src.processor import DataProcessor, data_version
+from src.analyzer import StatisticalEngine
+from src.predictor import BetAdvisor
+from src.pipeline import prediction_frame
+
+HTTP_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+def _json_safe(row):
+    """NaN vira null (JSON não tem NaN)."""
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}
+
+class LeagueState:
+    """Motor pronto de uma liga; é trocado inteiro (nunca alterado) quando chegam dados novos."""
+
+    def __init__(self, code, path, version, engine):
+        self.code = code
+        self.path = path
+        self.version = version
+        self.engine = engine
+        self.advisor = BetAdvisor(engine)
+        self.loaded_at = time.time()
+
+class LRUCache:
+    """Cache LRU de respostas; a chave inclui a versão dos dados, então trocar o motor já invalida."""
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+class LatencyTracker:
+    """Latência das últimas `window` requisições de cada rota (p50/p99 em ms)."""
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self.samples = {}
+
+    def record(self, route, seconds):
+        self.samples.setdefault(route, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self):
+        report = {}
+        for route, samples in self.samples.items():
+            ms = np.fromiter(samples, dtype=float) * 1000
+            report[route] = {'n': len(ms), 'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                             'p99_ms': round(float(np.percentile(ms, 99)), 3)}
+        return report
+
+class PredictionService:
+    """
+    Serviço HTTP local (asyncio, só stdlib) com um StatisticalEngine/BetAdvisor aquecido por liga.
+    Rotas:
+    - GET  /predict?league=E0&home=Chelsea&away=Tottenham
+    - POST /predict/batch  {"league": "E0", "fixtures": [["Chelsea", "Tottenham"], ...]} ou {"all_pairs": true}
+    - GET  /leagues, GET /stats (latência p50/p99 e cache), POST /reload?league=E0
+    Dados novos (outra versão do CSV) geram um motor novo em segundo plano, trocado atomicamente.
+    """
+
+    def __init__(self, leagues=None, sources=None, loader=None, cache_size=10_000, refresh_interval=600):
+        """
+        :param leagues: Códigos das ligas (ex: ['E0', 'SP1']); None = as de sources ou todas de DataLoader.LEAGUES
+        :param sources: {código: caminho do CSV} local no lugar do download
+        :param refresh_interval: Segundos entre as verificações de dados novos (None desativa)
+        """
+        self.loader = loader or DataLoader()
+        self.sources = dict(sources or {})
+        self.codes = list(leagues or self.sources or self.loader.LEAGUES.values())
+        self.refresh_interval = refresh_interval
+        self.leagues = {}
+        self.cache = LRUCache(cache_size)
+        self.latency = LatencyTracker()
+        self._server = None
+
+    def load_league(self, code):
+        """Recarrega a liga se o CSV mudou; o motor novo só entra no lugar do antigo quando está pronto."""
+        path = self.sources.get(code) or self.loader.fetch(code)
+        if path is None:
+            return self.leagues.get(code)
+        version = data_version(path)
+        current = self.leagues.get(code)
+        if current is not None and current.version == version:
+            return current
+
+        df = DataProcessor(raw_data_path=str(path)).df
+        if df is None:
+            return current
+        state = LeagueState(code, path, version, StatisticalEngine(df))
+        self.leagues[code] = state  # troca atômica: requisições em andamento seguem com o motor antigo
+        return state
+
+    async def refresh(self, codes=None):
+        """Verifica/recarrega as ligas em paralelo (threads), sem bloquear o loop de eventos."""
+        return await asyncio.gather(*(asyncio.to_thread(self.load_league, code) for code in (codes or self.codes)))
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Falha ao atualizar ligas: {e}")
+
+    def predict(self, league, pairs):
+        """
+        Previsões de vários confrontos: acertos vêm do cache, o resto sai de um único
+        prediction_frame (passada vetorizada) e entra no cache.
+        """
+        state = self.leagues.get(league)
+        if state is None:
+            raise KeyError(league)
+        keys = [(league, home, away, state.version) for home, away in pairs]
+        rows = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            homes = [pairs[i][0] for i in missing]
+            aways = [pairs[i][1] for i in missing]
+            frame = prediction_frame(state.engine, homes, aways)
+            for i, row in zip(missing, frame.to_dict('records')):
+                rows[i] = _json_safe(row)
+                self.cache.put(keys[i], rows[i])
+        return rows
+
+    def predict_one(self, league, home, away):
+        """Um confronto com as dicas do BetAdvisor (guardado no cache com a previsão)."""
+        state = self.leagues.get(league)
+        if state is None:
+            raise KeyError(league)
+        key = (league, home, away, state.version, 'dicas')
+        response = self.cache.get(key)
+        if response is None:
+            response = _json_safe(prediction_frame(state.engine, [home], [away]).to_dict('records')[0])
+            analysis = state.advisor.get_match_suggestion(home, away)
+            response['sugestoes'] = analysis.get('sugestoes', [])
+            response['versao_dados'] = state.version
+            self.cache.put(key, response)
+        return response
+
+    def stats(self):
+        return {
+            'latencia': self.latency.summary(),
+            'cache': {'itens': len(self.cache.items), 'acertos': self.cache.hits, 'faltas': self.cache.misses},
+            'ligas': {code: {'versao': s.version, 'times': len(s.engine.teams), 'jogos': len(s.engine.df)}
+                      for code, s in self.leagues.items()},
+        }
+
+    async def route(self, method, target, body):
+        """Resolve uma requisição: (status, objeto JSON)."""
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == '/predict':
+            if not {'league', 'home', 'away'} <= set(params):
+                return 400, {'erro': "Parâmetros obrigatórios: league, home, away"}
+            state = self.leagues.get(params['league'])
+            if state is None:
+                return 404, {'erro': f"Liga '{params['league']}' não carregada"}
+            unknown = [team for team in (params['home'], params['away']) if team not in state.engine.team_ids]
+            if unknown:
+                return 404, {'erro': f"Time(s) não encontrado(s) na liga: {', '.join(unknown)}"}
+            return 200, self.predict_one(params['league'], params['home'], params['away'])
+
+        if url.path == '/predict/batch':
+            if method != 'POST':
+                return 405, {'erro': "Use POST com um JSON"}
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                return 400, {'erro': "O corpo deve ser um objeto JSON"}
+            league = request.get('league')
+            if league not in self.leagues:
+                return 404, {'erro': f"Liga '{league}' não carregada"}
+            if request.get('all_pairs'):
+                homes, aways = self.leagues[league].engine.all_pairings()
+                pairs = list(zip(homes, aways))
+            else:
+                fixtures = request.get('fixtures', [])
+                if not isinstance(fixtures, list) or not all(
+                        isinstance(p, list) and len(p) == 2 and all(isinstance(t, str) for t in p) for p in fixtures):
+                    return 400, {'erro': "fixtures deve ser uma lista de pares [mandante, visitante]"}
+                pairs = [tuple(p) for p in fixtures]
+            return 200, {'previsoes': self.predict(league, pairs)}
+
+        if url.path == '/leagues':
+            return 200, {code: s.engine.teams for code, s in self.leagues.items()}
+        if url.path == '/stats':
+            return 200, self.stats()
+        if url.path == '/reload':
+            codes = [params['league']] if 'league' in params else self.codes
+            # Download e reconstrução em threads: as outras conexões continuam sendo atendidas
+            states = await self.refresh(codes)
+            return 200, {s.code: s.version for s in states if s is not None}
+        return 404, {'erro': f"Rota {url.path} não existe"}
+
+    async def _handle(self, reader, writer):
+        """Conexão HTTP/1.1 com keep-alive: lê requisições até o cliente fechar."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, _ = request_line.decode('latin-1').split()
+                except ValueError:
+                    self._respond(writer, 400, {'erro': "Linha de requisição inválida"}, close=True)
+                    await writer.drain()
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    # Sem saber onde o corpo termina não dá para seguir na mesma conexão
+                    self._respond(writer, 400, {'erro': "Content-Length inválido"}, close=True)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length)
+
+                start = time.perf_counter()
+                try:
+                    status, payload = await self.route(method, target, body)
+                except KeyError as e:
+                    status, payload = 404, {'erro': f"Liga {e} não carregada"}
+                except (ValueError, TypeError) as e:
+                    status, payload = 400, {'erro': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'erro': str(e)}
+                self.latency.record(urlsplit(target).path, time.perf_counter() - start)
+
+                close = headers.get('connection', '').lower() == 'close'
+                self._respond(writer, status, payload, close)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer, status, payload, close=False):
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + data)
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """Carrega as ligas e começa a aceitar conexões (retorna a porta em uso)."""
+        await self.refresh()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        if self.refresh_interval:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Para de aceitar conexões e encerra a atualização periódica."""
+        if getattr(self, '_refresh_task', None):
+            self._refresh_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self, host="127.0.0.1", port=8000):
+        port = await self.start(host, port)
+        print(f"🌐 Servindo {len(self.leagues)} liga(s) em http://{host}:{port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+# --- Bloco de Teste (latência fria vs. cache e troca do motor com dados novos) ---
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+
+    async def get(reader, writer, path):
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: local\r\n\r\n".encode())
+        await writer.drain()
+        headers = {}
+        await reader.readline()
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode().partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return json.loads(await reader.readexactly(int(headers['content-length'])))
+
+    async def demo():
+        with tempfile.TemporaryDirectory() as root:
+            csv_path = Path(root) / "E0.csv"
+            shutil.copyfile("data/premier_league_2526.csv", csv_path)
+            service = PredictionService(sources={'E0': csv_path}, refresh_interval=None)
+            port = await service.start(port=0)
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            homes, aways = service.leagues['E0'].engine.all_pairings()
+            for rodada in ("fria", "cache"):
+                start = time.perf_counter()
+                for home, away in zip(homes, aways):
+                    await get(reader, writer, f"/predict?league=E0&home={home}&away={away}".replace(' ', '%20'))
+                print(f"⚡ {len(homes)} requisições ({rodada}): {time.perf_counter() - start:.2f}s")
+            print("📊", service.latency.summary())
+
+            # Dados novos: o motor é reconstruído e trocado; a versão nova invalida o cache
+            old_version = service.leagues['E0'].version
+            os.utime(csv_path, ns=(time.time_ns(), time.time_ns()))
+            await service.refresh()
+            resposta = await get(reader, writer, f"/predict?league=E0&home={homes[0]}&away={aways[0]}".replace(' ', '%20'))
+            print(f"🔁 Versão {old_version} -> {resposta['versao_dados']} | {homes[0]} vs {aways[0]}: "
+                  f"casa {resposta['prob_casa']:.1%}")
+            print("📦 Cache:", (await get(reader, writer, "/stats"))['cache'])
+            writer.close()
+            await writer.wait_closed()
+            await service.stop()
+
+    asyncio.run(demo())
@@ -0,0 +1,164 @@
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.analyzer import goal_grid_size
+from src.markets import poisson_pmf
+from src.profiling import timed
+
+def _sample_goals(rng, cdf, n_sims):
+    """Poisson por CDF inversa: um uniforme por jogo comparado à tabela (G, n_jogos)."""
+    uniform = rng.random((n_sims, cdf.shape[1]))
+    goals = np.zeros(uniform.shape, dtype=np.int8)
+    for level in cdf:
+        goals += uniform > level
+    return goals
+
+def _simulate_chunk(cdf_home, cdf_away, home_idx, away_idx, base_points, base_gd, base_gf,
+                    n_sims, seed):
+    """
+    Simula n_sims vezes as rodadas restantes, sem loop por simulação:
+    gols ~ Poisson em arrays (n_sims, n_jogos) via CDF inversa, pontos/saldo agregados por time
+    com matrizes de incidência jogo x time e posições via argsort da chave de desempate.
+    Retorna a contagem de cada time em cada posição e a soma dos pontos finais.
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(base_points)
+    n_fixtures = cdf_home.shape[1]
+
+    goals_home = _sample_goals(rng, cdf_home, n_sims)
+    goals_away = _sample_goals(rng, cdf_away, n_sims)
+    home_points = 3.0 * (goals_home > goals_away) + (goals_home == goals_away)
+    away_points = 3.0 * (goals_away > goals_home) + (goals_home == goals_away)
+
+    # Incidência (n_jogos, n_times): soma por time vira produto de matrizes
+    home_inc = np.zeros((n_fixtures, n_teams))
+    away_inc = np.zeros((n_fixtures, n_teams))
+    home_inc[np.arange(n_fixtures), home_idx] = 1
+    away_inc[np.arange(n_fixtures), away_idx] = 1
+
+    goals_home, goals_away = goals_home.astype(float), goals_away.astype(float)
+    diff = goals_home - goals_away
+    points = base_points + home_points @ home_inc + away_points @ away_inc
+    gd = base_gd + diff @ home_inc - diff @ away_inc
+    gf = base_gf + goals_home @ home_inc + goals_away @ away_inc
+
+    # Desempate: pontos, saldo, gols pró e, por último, sorteio
+    key = points * 1e8 + (gd + 5000) * 1e4 + gf + rng.random((n_sims, n_teams))
+    order = np.argsort(-key, axis=1)
+    positions = np.empty_like(order)
+    positions[np.arange(n_sims)[:, None], order] = np.arange(n_teams)[None, :]
+
+    # Contagem time x posição num único bincount
+    cells = (np.arange(n_teams)[None, :] * n_teams + positions).ravel()
+    position_counts = np.bincount(cells, minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    return position_counts, points.sum(axis=0)
+
+class SeasonSimulator:
+    """
+    Projeção do restante da temporada por Monte Carlo a partir dos lambdas do StatisticalEngine.
+    Os gols de cada jogo restante são sorteados como Poisson independentes (sem a correção rho).
+    """
+
+    def __init__(self, engine, top=4, relegation=3):
+        self.engine = engine
+        self.top = top
+        self.relegation = relegation
+
+    def current_table(self):
+        """Pontos, saldo e gols pró atuais de cada time (na ordem de engine.teams)."""
+        df = self.engine.df.dropna(subset=['gols_mandante', 'gols_visitante'])
+        n = len(self.engine.teams)
+        h = self.engine.encode(df['mandante'])
+        a = self.engine.encode(df['visitante'])
+        gh = df['gols_mandante'].to_numpy(dtype=int)
+        ga = df['gols_visitante'].to_numpy(dtype=int)
+
+        points = (np.bincount(h, 3 * (gh > ga) + (gh == ga), n)
+                  + np.bincount(a, 3 * (ga > gh) + (gh == ga), n)).astype(int)
+        gd = (np.bincount(h, gh - ga, n) + np.bincount(a, ga - gh, n)).astype(int)
+        gf = (np.bincount(h, gh, n) + np.bincount(a, ga, n)).astype(int)
+        return points, gd, gf
+
+    def remaining_fixtures(self):
+        """Confrontos do turno e returno ainda não disputados (mandante, visitante)."""
+        homes, aways = self.engine.all_pairings()
+        n = len(self.engine.teams)
+        # Cada confronto vira um inteiro (mandante * n + visitante)
+        played = self.engine.encode(self.engine.df['mandante']) * n + self.engine.encode(self.engine.df['visitante'])
+        pending = ~np.isin(self.engine.encode(homes) * n + self.engine.encode(aways), played)
+        return homes[pending], aways[pending]
+
+    @timed('simulator.simulate')
+    def simulate(self, fixtures=None, n_sims=100_000, seed=None, chunk_size=20_000, workers=1):
+        """
+        Simula o restante da temporada n_sims vezes.
+        :param fixtures: (mandantes, visitantes) restantes; None = remaining_fixtures()
+        :param seed: Semente do gerador (resultado reprodutível, independente de workers)
+        :param chunk_size: Simulações por bloco (limita a memória)
+        :param workers: >1 distribui os blocos em processos
+        :return: DataFrame por time com pontos esperados e probabilidades de título/top/rebaixamento
+        """
+        homes, aways = fixtures if fixtures is not None else self.remaining_fixtures()
+        teams = self.engine.teams
+        n_teams = len(teams)
+        base_points, base_gd, base_gf = self.current_table()
+
+        if len(homes):
+            prediction = self.engine.predict_matches(homes, aways)
+            # Jogos sem lambda (time sem dados) usam a média da liga
+            lambda_home = np.where(prediction['valid'], prediction['lambda_home'], self.engine.league_avgs['home_goals'])
+            lambda_away = np.where(prediction['valid'], prediction['lambda_away'], self.engine.league_avgs['away_goals'])
+        else:
+            lambda_home = lambda_away = np.zeros(0)
+        # Tabela de CDF por jogo (uma vez por simulação inteira, não por bloco)
+        lambdas = np.concatenate([lambda_home, lambda_away])
+        size = goal_grid_size(lambdas.max() if len(lambdas) else np.nan)
+        cdf_home = np.cumsum(poisson_pmf(lambda_home, size), axis=1).T
+        cdf_away = np.cumsum(poisson_pmf(lambda_away, size), axis=1).T
+        home_idx = self.engine.encode(homes)
+        away_idx = self.engine.encode(aways)
+
+        sizes = [min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = [(cdf_home, cdf_away, home_idx, away_idx, base_points, base_gd, base_gf, size, s)
+                for size, s in zip(sizes, seeds)]
+
+        if workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_simulate_chunk, *zip(*args)))
+        else:
+            results = [_simulate_chunk(*a) for a in args]
+
+        position_counts = sum(r[0] for r in results)
+        points_sum = sum(r[1] for r in results)
+        position_probs = position_counts / n_sims
+
+        table = pd.DataFrame({
+            'time': teams,
+            'pontos_atuais': base_points,
+            'pontos_esperados': points_sum / n_sims,
+            'posicao_media': position_probs @ np.arange(1, n_teams + 1),
+            'prob_titulo': position_probs[:, 0],
+            f'prob_top{self.top}': position_probs[:, :self.top].sum(axis=1),
+            'prob_rebaixamento': position_probs[:, n_teams - self.relegation:].sum(axis=1),
+        })
+        self.position_probs = position_probs
+        return table.sort_values('posicao_media').reset_index(drop=True)
+
+# --- Bloco de Teste ---
+if __name__ == "__main__":
+    from src.processor import DataProcessor
+    from src.analyzer import StatisticalEngine
+
+    engine = StatisticalEngine(DataProcessor().df)
+    simulator = SeasonSimulator(engine)
+    homes, aways = simulator.remaining_fixtures()
+    print(f"📅 {len(homes)} jogos restantes")
+
+    for n_sims, workers in ((100_000, 1), (1_000_000, 1), (1_000_000, 4)):
+        start = time.perf_counter()
+        tabela = simulator.simulate(n_sims=n_sims, seed=42, workers=workers)
+        print(f"🎲 {n_sims:>9,} simulações ({workers} processo(s)): {time.perf_counter() - start:.2f}s")
+
+    print(tabela.round(3).to_string(index=False))